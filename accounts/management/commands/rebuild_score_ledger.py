@@ -0,0 +1,80 @@
+# accounts/management/commands/rebuild_score_ledger.py
+
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Profile, ScoreEvent, ScoreRollup
+from accounts.scoring import compute_activity_scores
+
+
+class Command(BaseCommand):
+    help = "Reseed the score ledger and daily rollups from existing contributions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per bulk_create statement",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        today = timezone.localdate()
+
+        self.stdout.write("Computing points per user and day...")
+        per_day = defaultdict(int)
+        for (user_id, day), points in compute_activity_scores(by_day=True).items():
+            # Contributions without a timestamp (e.g. blogs never stamped as
+            # published) are booked today
+            per_day[(user_id, day or today)] += points
+
+        totals = defaultdict(int)
+        for (user_id, _), points in per_day.items():
+            totals[user_id] += points
+
+        events = []
+        rollups = defaultdict(int)
+        for (user_id, day), points in per_day.items():
+            if not points:
+                continue
+            when = timezone.make_aware(datetime.combine(day, time.min))
+            events.append(
+                ScoreEvent(user_id=user_id, source="backfill", points=points, created_at=when)
+            )
+            rollups[(user_id, day)] += points
+
+        # Book any drift between the contributions and the stored score, so
+        # every user's ledger sums to their activity_score
+        now = timezone.now()
+        for user_id, score in Profile.objects.values_list("user_id", "activity_score"):
+            drift = score - totals.get(user_id, 0)
+            if drift:
+                events.append(
+                    ScoreEvent(user_id=user_id, source="adjustment", points=drift, created_at=now)
+                )
+                rollups[(user_id, today)] += drift
+
+        with transaction.atomic():
+            ScoreEvent.objects.all().delete()
+            ScoreRollup.objects.all().delete()
+            ScoreEvent.objects.bulk_create(events, batch_size=batch_size)
+            ScoreRollup.objects.bulk_create(
+                [
+                    ScoreRollup(user_id=user_id, day=day, points=points)
+                    for (user_id, day), points in rollups.items()
+                    if points
+                ],
+                batch_size=batch_size,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCompleted! Wrote {len(events)} ledger events "
+                f"across {len(rollups)} user-days."
+            )
+        )
@@ -1,12 +1,31 @@
 # accounts/management/commands/update_activity_scores.py
 
+from concurrent.futures import ProcessPoolExecutor
+
+import django
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Max, Min
 from accounts.models import Profile
+from accounts.scoring import recompute_activity_scores
 
 User = get_user_model()
 
 
+def _init_worker():
+    """Make Django usable in a freshly started worker process"""
+    django.setup()
+
+
+def _recompute_range(bounds):
+    start_id, end_id, batch_size = bounds
+    try:
+        return recompute_activity_scores(start_id, end_id, batch_size=batch_size)
+    finally:
+        connections.close_all()
+
+
 class Command(BaseCommand):
     help = "Recalculate activity scores for all users"
 
@@ -16,6 +35,18 @@ class Command(BaseCommand):
             type=str,
             help="Update score for a specific user only",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Split the user-id range across N worker processes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Profiles written per bulk_update statement",
+        )
 
     def handle(self, *args, **options):
         username = options.get("username")
@@ -40,23 +71,37 @@ class Command(BaseCommand):
             except User.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f"User {username} not found"))
         else:
-            # Update all users
+            # Update all users with grouped aggregate queries
             self.stdout.write("Updating activity scores for all users...")
 
-            profiles = Profile.objects.select_related("user").all()
-            total = profiles.count()
-            updated = 0
+            workers = max(options["workers"], 1)
+            batch_size = options["batch_size"]
 
-            for profile in profiles:
-                old_score = profile.activity_score
-                profile.update_activity_score()
-                new_score = profile.activity_score
+            bounds = Profile.objects.aggregate(low=Min("user_id"), high=Max("user_id"))
+            if bounds["low"] is None:
+                self.stdout.write(self.style.SUCCESS("\nNo profiles to update."))
+                return
 
-                if old_score != new_score:
-                    updated += 1
-                    self.stdout.write(
-                        f"  {profile.user.username}: {old_score} → {new_score} points"
-                    )
+            # Contiguous user-id ranges, one per worker
+            low, high = bounds["low"], bounds["high"] + 1
+            step = -(-(high - low) // workers)
+            ranges = [
+                (start, min(start + step, high), batch_size)
+                for start in range(low, high, step)
+            ]
+
+            if workers == 1:
+                results = [recompute_activity_scores(*ranges[0])]
+            else:
+                # Children must not inherit the parent's open DB connections
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker
+                ) as pool:
+                    results = list(pool.map(_recompute_range, ranges))
+
+            total = sum(checked for checked, _ in results)
+            updated = sum(changed for _, changed in results)
 
             self.stdout.write(
                 self.style.SUCCESS(f"\nCompleted! Updated {updated}/{total} profiles.")
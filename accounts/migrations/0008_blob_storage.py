@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:41
+
+import riseapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_pic',
+            field=models.ImageField(blank=True, default='profile_pics/default.png', null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='profile_pics/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def recompute(apps, schema_editor):
+    # Scores are now kept by deltas (accounts.signals); bring the stored
+    # values up to the current formula, which also counts FeedPosts and DSA
+    # activity, so later deltas never take back points never credited
+    from accounts.scoring import recompute_activity_scores
+
+    recompute_activity_scores(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_blob_storage'),
+        ('community', '0005_blog_status_published_idx'),
+        ('feed', '0012_blob_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,14 @@
 # accounts/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.conf import settings
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from tinymce.models import HTMLField
+from riseapp.storage import blob_storage
+from .scoring import compute_activity_scores, record_score_events
 
 
 # ------------------ USER ------------------
@@ -51,10 +54,12 @@ class Profile(models.Model):
     )
     profile_pic = models.ImageField(
         upload_to="profile_pics/",
+        storage=blob_storage,
         default="profile_pics/default.png",
         blank=True,
         null=True,
     )
+    profile_pic_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(
         blank=True,
         null=True,
@@ -77,60 +82,40 @@ class Profile(models.Model):
         - Blog: 10 points
         - Post (text only): 2 points
         - Post (with image/video): 5 points
+        - Feed blog / project post: 10 points
         - Each like given by others: 1 point
         - Each comment by others: 2 points
+        - Solved DSA problem: its points_earned
         """
         total_points = 0
 
         try:
-            # Projects: 10 points each
-            from community.models import Project
-
-            projects_count = (
-                Project.objects.filter(
-                    models.Q(leader=self.user) | models.Q(members=self.user)
-                )
-                .distinct()
-                .count()
-            )
-            total_points += projects_count * 10
-
-            # Blogs: 10 points each
-            from community.models import Blog
-
-            blogs_count = Blog.objects.filter(
-                author=self.user, status="published"
-            ).count()
-            total_points += blogs_count * 10
-
-            # Feed Posts
-            from feed.models import Post
-
-            user_posts = Post.objects.filter(author=self.user, is_active=True)
-
-            for post in user_posts:
-                # Text-only posts: 2 points
-                # Posts with image/video: 5 points
-                if post.image or post.video:
-                    total_points += 5
-                else:
-                    total_points += 2
-
-                # Likes on this post: 1 point each
-                total_points += post.likes_count
-
-                # Comments on this post: 2 points each
-                total_points += post.comments_count * 2
-
+            scores = compute_activity_scores(self.user_id, self.user_id + 1)
+            total_points = max(scores.get(self.user_id, 0), 0)
         except Exception as e:
             print(f"Error calculating activity score for {self.user.username}: {e}")
 
         return total_points
 
     def update_activity_score(self):
-        """Update and save the activity score"""
+        """
+        Recompute and save the activity score from scratch.
+
+        Day-to-day changes are applied as deltas by accounts.signals; this
+        full recompute is meant for offline repair only.
+        """
+        stored = (
+            Profile.objects.filter(pk=self.pk)
+            .values_list("activity_score", flat=True)
+            .first()
+            or 0
+        )
         self.activity_score = self.calculate_activity_score()
-        self.save(update_fields=["activity_score"])
+        with transaction.atomic():
+            self.save(update_fields=["activity_score"])
+            record_score_events(
+                [(self.user_id, self.activity_score - stored, "adjustment")]
+            )
 
     @property
     def blogs_count(self):
@@ -160,6 +145,59 @@ class ProfileLink(models.Model):
         return f"{self.title} ({self.profile.user.username})"
 
 
+# ------------------ SCORE LEDGER ------------------
+class ScoreEvent(models.Model):
+    """
+    One signed change to a user's activity score.
+
+    Rows are only ever appended (see accounts.scoring.apply_score_delta), so
+    summing a user's events reproduces Profile.activity_score and shows
+    where every point came from.
+    """
+
+    SOURCE_CHOICES = (
+        ("post", "Post"),
+        ("like", "Like"),
+        ("comment", "Comment"),
+        ("blog", "Blog"),
+        ("project", "Project"),
+        ("dsa", "DSA Activity"),
+        ("adjustment", "Adjustment"),
+        ("backfill", "Backfill"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="score_events", on_delete=models.CASCADE
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    points = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+    def __str__(self):
+        return f"{self.user_id} {self.points:+d} ({self.source})"
+
+
+class ScoreRollup(models.Model):
+    """Net points per user per local day, kept alongside the ledger"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="score_rollups", on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "day")
+        indexes = [models.Index(fields=["day", "user"])]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.points}"
+
+
 # ------------------ VISITOR EXTENSIONS ------------------
 class VisitorPreference(models.Model):
     user = models.OneToOneField(
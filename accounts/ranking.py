@@ -0,0 +1,273 @@
+# accounts/ranking.py
+
+import bisect
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# One row of the standings; ranks are dense, ties listed by user id
+Standing = namedtuple("Standing", ["user_id", "points", "rank"])
+
+
+class FenwickTree:
+    """Binary indexed tree over integer keys 0..capacity-1"""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.total = 0
+        self._tree = [0] * (capacity + 1)
+
+    def add(self, key, delta):
+        self.total += delta
+        i = key + 1
+        while i <= self.capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, key):
+        """Sum of the values stored at keys 0..key"""
+        result = 0
+        i = min(key + 1, self.capacity)
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, k):
+        """Smallest key whose prefix sum reaches k (1 <= k <= total)"""
+        pos = 0
+        step = 1 << self.capacity.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.capacity and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class _Standings:
+    """One loaded copy of the standings; see ScoreRanking"""
+
+    def __init__(self, rows):
+        top = max((score for _, score in rows), default=0)
+        capacity = max(64, 1 << (top + 1).bit_length())
+        self.scores = {}  # user_id -> score
+        self.buckets = {}  # score -> sorted [user_id]
+        self.users = FenwickTree(capacity)
+        self.distinct = FenwickTree(capacity)
+        for user_id, score in rows:
+            self.insert(user_id, score)
+
+    def _grow(self, score):
+        capacity = self.users.capacity
+        while capacity <= score:
+            capacity *= 2
+        users, distinct = FenwickTree(capacity), FenwickTree(capacity)
+        for bucket_score, bucket in self.buckets.items():
+            users.add(bucket_score, len(bucket))
+            distinct.add(bucket_score, 1)
+        self.users, self.distinct = users, distinct
+
+    def insert(self, user_id, score):
+        if score >= self.users.capacity:
+            self._grow(score)
+        bucket = self.buckets.setdefault(score, [])
+        if not bucket:
+            self.distinct.add(score, 1)
+        bisect.insort(bucket, user_id)
+        self.users.add(score, 1)
+        self.scores[user_id] = score
+
+    def discard(self, user_id):
+        score = self.scores.pop(user_id, None)
+        if score is None:
+            return
+        bucket = self.buckets[score]
+        del bucket[bisect.bisect_left(bucket, user_id)]
+        self.users.add(score, -1)
+        if not bucket:
+            del self.buckets[score]
+            self.distinct.add(score, -1)
+
+    def set_score(self, user_id, score):
+        self.discard(user_id)
+        self.insert(user_id, max(score, 0))
+
+    def adjust(self, user_id, delta):
+        if user_id in self.scores:
+            self.set_score(user_id, self.scores[user_id] + delta)
+
+    def rank_for_score(self, score):
+        return self.distinct.total - self.distinct.prefix(score) + 1
+
+    def position(self, user_id):
+        """0-based place of a user in the standings"""
+        score = self.scores[user_id]
+        above = self.users.total - self.users.prefix(score)
+        return above + bisect.bisect_left(self.buckets[score], user_id)
+
+    def slice(self, start, stop):
+        """Standings for places start..stop-1"""
+        entries = []
+        stop = min(stop, self.users.total)
+        position = max(start, 0)
+        while position < stop:
+            # The bucket holding this place, counted from the lowest score
+            score = self.users.find(self.users.total - position)
+            bucket = self.buckets[score]
+            offset = position - (self.users.total - self.users.prefix(score))
+            rank = self.rank_for_score(score)
+            for user_id in bucket[offset:offset + stop - position]:
+                entries.append(Standing(user_id, score, rank))
+            position += len(bucket) - offset
+        return entries
+
+
+class ScoreRanking:
+    """
+    In-memory order statistics over Profile.activity_score.
+
+    Users are grouped into one bucket per score. A Fenwick tree counts the
+    users in each bucket and a second one marks the non-empty buckets, so a
+    dense rank, the n-th entry of the standings and a move between buckets
+    are all O(log max_score) instead of a COUNT or ORDER BY over profiles.
+
+    The structure is loaded from the database on first use and kept current
+    by score-change events (see accounts.scoring.score_changed). Events only
+    reach the process that raised them, so each process also reloads itself
+    once its copy is older than `max_age` seconds. That reload runs in a
+    background thread while queries keep using the current copy; changes
+    made meanwhile are replayed onto the new copy before it is swapped in.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()  # guards the current copy
+        self._loading = threading.Lock()  # held while a copy is being loaded
+        self._standings = None
+        self._built_at = None
+        self._journal = None  # changes seen while a copy loads
+
+    # -- maintenance ---------------------------------------------------
+
+    def _load(self):
+        from .models import Profile
+
+        # Journal from before the SELECT, so no change committed after its
+        # snapshot is missed. Changes that committed before it may be
+        # replayed too; score events carry absolute scores (see
+        # accounts.scoring.score_changed), so replaying them is harmless.
+        with self._lock:
+            self._journal = []
+        try:
+            standings = _Standings(list(Profile.objects.values_list("user_id", "activity_score")))
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            for change in self._journal:
+                change(standings)
+            self._journal = None
+            self._standings = standings
+            self._built_at = time.monotonic()
+
+    def rebuild(self):
+        """Reload every profile's score from the database"""
+        with self._loading:
+            self._load()
+
+    def _refresh_in_background(self):
+        if not self._loading.acquire(blocking=False):
+            return  # Already reloading
+
+        def refresh():
+            try:
+                self._load()
+            except Exception:
+                logger.exception("Could not reload the score ranking")
+            finally:
+                self._loading.release()
+                # The thread's own connection
+                connections.close_all()
+
+        threading.Thread(target=refresh, name="score-ranking-refresh", daemon=True).start()
+
+    def invalidate(self):
+        """Drop the loaded standings; the next query reloads them"""
+        with self._lock:
+            self._standings = None
+            self._built_at = None
+
+    def _current(self):
+        """The loaded standings, loading them first if there are none"""
+        standings, built_at = self._standings, self._built_at
+        if standings is None:
+            self.rebuild()
+            return self._standings
+        if time.monotonic() - built_at >= self.max_age:
+            self._refresh_in_background()
+        return standings
+
+    def _change(self, change):
+        with self._lock:
+            if self._standings is not None:
+                change(self._standings)
+            if self._journal is not None:
+                self._journal.append(change)
+
+    def set_score(self, user_id, score):
+        """Record a user's absolute score"""
+        self._change(lambda standings: standings.set_score(user_id, score))
+
+    def adjust(self, user_id, delta):
+        """
+        Apply a score delta, clamped at zero like apply_score_delta().
+
+        Prefer set_score(): a delta made while a copy loads is replayed onto
+        it even if the copy already counts it.
+        """
+        self._change(lambda standings: standings.adjust(user_id, delta))
+
+    def remove(self, user_id):
+        self._change(lambda standings: standings.discard(user_id))
+
+    # -- queries -------------------------------------------------------
+
+    def rank_of(self, user):
+        """Dense rank of a user (1 = highest score), or 0 if unknown"""
+        user_id = getattr(user, "pk", user)
+        standings = self._current()
+        with self._lock:
+            if user_id not in standings.scores:
+                return 0
+            return standings.rank_for_score(standings.scores[user_id])
+
+    def top(self, k=10):
+        """The first k standings"""
+        standings = self._current()
+        with self._lock:
+            return standings.slice(0, k)
+
+    def around(self, user, k=5):
+        """Up to k standings either side of a user, including the user"""
+        user_id = getattr(user, "pk", user)
+        standings = self._current()
+        with self._lock:
+            if user_id not in standings.scores:
+                return []
+            position = standings.position(user_id)
+            return standings.slice(position - k, position + k + 1)
+
+
+score_ranking = ScoreRanking(
+    max_age=getattr(settings, "LEADERBOARD_RANKING_MAX_AGE", 300),
+)
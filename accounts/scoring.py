@@ -0,0 +1,293 @@
+# accounts/scoring.py
+
+from collections import defaultdict
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Activity points per contribution (see Profile.calculate_activity_score)
+PROJECT_POINTS = 10
+BLOG_POINTS = 10
+TEXT_POST_POINTS = 2
+MEDIA_POST_POINTS = 5
+LIKE_POINTS = 1
+COMMENT_POINTS = 2
+
+# Sent after a score change commits, with user_id, `score` (the new absolute
+# value) and, for an incremental change, its `delta`
+score_changed = Signal()
+
+
+def record_score_events(events, when=None, apps=global_apps):
+    """
+    Append [(user_id, points, source)] to the score ledger.
+
+    Each event also bumps the user's rollup row for the local day, so
+    windowed totals are a range sum over a few rollup rows instead of a
+    scan of the ledger or the source tables.
+    """
+    ScoreEvent = apps.get_model("accounts", "ScoreEvent")
+    ScoreRollup = apps.get_model("accounts", "ScoreRollup")
+
+    events = [(user_id, points, source) for user_id, points, source in events if points]
+    if not events:
+        return
+
+    when = when or timezone.now()
+    ScoreEvent.objects.bulk_create(
+        ScoreEvent(user_id=user_id, points=points, source=source, created_at=when)
+        for user_id, points, source in events
+    )
+
+    day = timezone.localdate(when)
+    per_user = defaultdict(int)
+    for user_id, points, _ in events:
+        per_user[user_id] += points
+
+    for user_id, points in per_user.items():
+        rollup = ScoreRollup.objects.filter(user_id=user_id, day=day)
+        if rollup.update(points=F("points") + points):
+            continue
+        try:
+            with transaction.atomic():
+                ScoreRollup.objects.create(user_id=user_id, day=day, points=points)
+        except IntegrityError:
+            # Another request created today's row first
+            rollup.update(points=F("points") + points)
+
+
+def apply_score_delta(user_id, delta, source="adjustment"):
+    """
+    Add a signed delta to a user's activity score, clamped at zero.
+
+    The addition runs in the database on the locked row, so concurrent
+    events never overwrite each other. The change actually applied (less
+    than `delta` when clamped) is appended to the score ledger under
+    `source`, so the ledger keeps summing to the stored score.
+    """
+    if not user_id or not delta:
+        return
+
+    from .models import Profile
+
+    profile = Profile.objects.filter(user_id=user_id)
+    with transaction.atomic():
+        # The row lock keeps the score from moving between read and write
+        before = profile.select_for_update().values_list("activity_score", flat=True).first()
+        if before is None:
+            return
+        applied = max(before + delta, 0) - before
+        if not applied:
+            return
+        profile.update(activity_score=F("activity_score") + applied)
+        record_score_events([(user_id, applied, source)])
+    score = before + applied
+    transaction.on_commit(
+        lambda: score_changed.send(sender=Profile, user_id=user_id, delta=applied, score=score)
+    )
+
+
+def post_points(has_media, is_active):
+    """Points a feed post earns its author, before likes and comments"""
+    if not is_active:
+        return 0
+    return MEDIA_POST_POINTS if has_media else TEXT_POST_POINTS
+
+
+def post_engagement_points(post_id):
+    """Points earned from the likes and comments on one post"""
+    from feed.models import PostLike, Comment
+
+    likes = PostLike.objects.filter(post_id=post_id).count()
+    comments = Comment.objects.filter(post_id=post_id).count()
+    return likes * LIKE_POINTS + comments * COMMENT_POINTS
+
+
+def blog_points(status):
+    """Only published blogs count towards the score"""
+    return BLOG_POINTS if status == "published" else 0
+
+
+def feed_post_points(post_type, has_media, is_active):
+    """Points a FeedPost earns its author, before likes and comments"""
+    if not is_active:
+        return 0
+    if post_type == "blog":
+        return BLOG_POINTS
+    if post_type == "project":
+        return PROJECT_POINTS
+    return MEDIA_POST_POINTS if has_media else TEXT_POST_POINTS
+
+
+def _has_file(field):
+    return Q(**{f"{field}__isnull": False}) & ~Q(**{field: ""})
+
+
+def compute_activity_scores(start_id=None, end_id=None, since=None, by_day=False, apps=global_apps):
+    """
+    Compute activity scores for every user with start_id <= id < end_id.
+
+    Instead of walking each user's posts, every contribution type is summed
+    with one grouped aggregate query (GROUP BY user), so the cost depends on
+    the number of source tables, not on the number of users or posts.
+
+    With `since`, only contributions made at or after that moment count
+    (projects by creation, blogs by publication, likes and comments by when
+    they were left), which gives the points earned within a period. With
+    `by_day`, points are further split by the local day they were earned.
+
+    Returns {user_id: score}, or {(user_id, day): points} with `by_day`;
+    users without any contribution are omitted. `apps` is the model
+    registry to use (a migration passes its historical one).
+    """
+    Blog, DSAActivity, Project = (
+        apps.get_model("community", name) for name in ("Blog", "DSAActivity", "Project")
+    )
+    Post, PostLike, Comment, FeedPost, PostMedia, PostLikeNew, PostComment = (
+        apps.get_model("feed", name)
+        for name in (
+            "Post", "PostLike", "Comment", "FeedPost", "PostMedia", "PostLikeNew", "PostComment"
+        )
+    )
+
+    scores = defaultdict(int)
+
+    def grouped(queryset, user_field, when, **aggregates):
+        if since is not None:
+            queryset = queryset.filter(**{f"{when}__gte": since})
+        if start_id is not None:
+            queryset = queryset.filter(**{f"{user_field}__gte": start_id})
+        if end_id is not None:
+            queryset = queryset.filter(**{f"{user_field}__lt": end_id})
+        queryset = queryset.filter(**{f"{user_field}__isnull": False}).order_by()
+        if by_day:
+            queryset = queryset.annotate(day=TruncDate(when)).values(user_field, "day")
+        else:
+            queryset = queryset.values(user_field)
+        for row in queryset.annotate(**aggregates):
+            key = (row[user_field], row["day"]) if by_day else row[user_field]
+            yield key, row
+
+    # Projects count once per user, whether they lead the project or are a member
+    for key, row in grouped(Project.objects.all(), "leader", "created_at", n=Count("pk")):
+        scores[key] += row["n"] * PROJECT_POINTS
+    for key, row in grouped(
+        Project.members.through.objects.all(), "user", "project__created_at", n=Count("pk")
+    ):
+        scores[key] += row["n"] * PROJECT_POINTS
+    for key, row in grouped(
+        Project.objects.filter(members=F("leader")), "leader", "created_at", n=Count("pk")
+    ):
+        scores[key] -= row["n"] * PROJECT_POINTS
+
+    # Published blogs
+    for key, row in grouped(
+        Blog.objects.filter(status="published"), "author", "published_at", n=Count("pk")
+    ):
+        scores[key] += row["n"] * BLOG_POINTS
+
+    # Solved DSA problems carry their own points
+    for key, row in grouped(
+        DSAActivity.objects.all(), "user", "date_solved", n=Sum("points_earned")
+    ):
+        scores[key] += row["n"] or 0
+
+    # Legacy feed posts
+    for key, row in grouped(
+        Post.objects.filter(is_active=True),
+        "author",
+        "created_at",
+        total=Count("pk"),
+        media=Count("pk", filter=_has_file("image") | _has_file("video")),
+    ):
+        scores[key] += (
+            row["media"] * MEDIA_POST_POINTS
+            + (row["total"] - row["media"]) * TEXT_POST_POINTS
+        )
+
+    # New feed posts (media is checked against PostMedia itself so repairs
+    # never depend on the denormalized has_media flag)
+    feed_posts = FeedPost.objects.filter(is_active=True).annotate(
+        with_media=Exists(PostMedia.objects.filter(post=OuterRef("pk")))
+    )
+    for key, row in grouped(
+        feed_posts,
+        "author",
+        "created_at",
+        blogs=Count("pk", filter=Q(post_type="blog")),
+        projects=Count("pk", filter=Q(post_type="project")),
+        normal=Count("pk", filter=Q(post_type="normal")),
+        media=Count("pk", filter=Q(post_type="normal", with_media=True)),
+    ):
+        scores[key] += (
+            row["blogs"] * BLOG_POINTS
+            + row["projects"] * PROJECT_POINTS
+            + row["media"] * MEDIA_POST_POINTS
+            + (row["normal"] - row["media"]) * TEXT_POST_POINTS
+        )
+
+    # Likes and comments received on active posts, credited to the post author
+    for model, points in (
+        (PostLike, LIKE_POINTS),
+        (Comment, COMMENT_POINTS),
+        (PostLikeNew, LIKE_POINTS),
+        (PostComment, COMMENT_POINTS),
+    ):
+        for key, row in grouped(
+            model.objects.filter(post__is_active=True),
+            "post__author",
+            "created_at",
+            n=Count("pk"),
+        ):
+            scores[key] += row["n"] * points
+
+    return dict(scores)
+
+
+def recompute_activity_scores(start_id=None, end_id=None, batch_size=1000, apps=global_apps):
+    """
+    Recompute and store scores for profiles with start_id <= user_id < end_id.
+
+    Only profiles whose score actually changed are written, with chunked
+    bulk_update. Returns (profiles_checked, profiles_updated).
+    """
+    Profile = apps.get_model("accounts", "Profile")
+
+    scores = compute_activity_scores(start_id, end_id, apps=apps)
+
+    profiles = Profile.objects.only("pk", "user_id", "activity_score").order_by("user_id")
+    if start_id is not None:
+        profiles = profiles.filter(user_id__gte=start_id)
+    if end_id is not None:
+        profiles = profiles.filter(user_id__lt=end_id)
+
+    checked = 0
+    changed = []
+    before = {}
+    for profile in profiles.iterator(chunk_size=batch_size):
+        checked += 1
+        score = max(scores.get(profile.user_id, 0), 0)
+        if profile.activity_score != score:
+            before[profile.user_id] = profile.activity_score
+            profile.activity_score = score
+            changed.append(profile)
+
+    with transaction.atomic():
+        Profile.objects.bulk_update(changed, ["activity_score"], batch_size=batch_size)
+        # Keep the ledger summing to the stored scores
+        record_score_events(
+            (
+                (profile.user_id, profile.activity_score - before[profile.user_id], "adjustment")
+                for profile in changed
+            ),
+            apps=apps,
+        )
+    for profile in changed:
+        score_changed.send(
+            sender=Profile, user_id=profile.user_id, score=profile.activity_score
+        )
+    return checked, len(changed)
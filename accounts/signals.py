@@ -1,109 +1,465 @@
 # accounts/signals.py
+#
+# Activity scores are maintained incrementally: every event applies a signed,
+# constant-time delta to the affected profile. The full recompute in
+# Profile.update_activity_score() is only used by the offline repair command
+# (`manage.py update_activity_scores`).
 
-from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models import Q
+
+from .scoring import (
+    PROJECT_POINTS,
+    LIKE_POINTS,
+    COMMENT_POINTS,
+    apply_score_delta,
+    post_points,
+    post_engagement_points,
+    blog_points,
+    feed_post_points,
+    MEDIA_POST_POINTS,
+    TEXT_POST_POINTS,
+    score_changed,
+)
+from .ranking import score_ranking
+
+
+def _post_state(post_id):
+    """(author_id, is_active) of a feed post, or None if it no longer exists"""
+    from feed.models import Post
+
+    return (
+        Post.objects.filter(pk=post_id)
+        .values_list("author_id", "is_active")
+        .first()
+    )
+
+
+# ------------------ FEED POSTS ------------------
+@receiver(pre_save, sender="feed.Post")
+def remember_post_score_state(sender, instance, **kwargs):
+    """Stash the stored author/active/media state so post_save can diff it"""
+    instance._score_before = None
+    if instance.pk and not instance._state.adding:
+        old = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("author_id", "is_active", "image", "video")
+            .first()
+        )
+        if old:
+            author_id, is_active, image, video = old
+            instance._score_before = (author_id, is_active, bool(image or video))
 
 
 @receiver(post_save, sender="feed.Post")
 def update_score_on_post_save(sender, instance, created, **kwargs):
-    """Update author's activity score when a post is created or updated"""
-    if instance.author and hasattr(instance.author, "profile"):
-        instance.author.profile.update_activity_score()
+    """Credit a new post, or apply the difference when a post changes"""
+    has_media = bool(instance.image or instance.video)
+    new_points = post_points(has_media, instance.is_active)
+
+    before = getattr(instance, "_score_before", None)
+    if created or before is None:
+        apply_score_delta(instance.author_id, new_points, "post")
+        return
+
+    old_author_id, old_active, old_media = before
+    old_points = post_points(old_media, old_active)
+
+    if old_author_id != instance.author_id or old_active != instance.is_active:
+        # Likes and comments only count while the post is active, so move them too
+        engagement = post_engagement_points(instance.pk)
+        if old_active:
+            old_points += engagement
+        if instance.is_active:
+            new_points += engagement
+        apply_score_delta(old_author_id, -old_points, "post")
+        apply_score_delta(instance.author_id, new_points, "post")
+    else:
+        apply_score_delta(instance.author_id, new_points - old_points, "post")
 
 
 @receiver(post_delete, sender="feed.Post")
 def update_score_on_post_delete(sender, instance, **kwargs):
-    """Update author's activity score when a post is deleted"""
-    if instance.author and hasattr(instance.author, "profile"):
-        instance.author.profile.update_activity_score()
+    """Remove the post's own points; its likes and comments remove theirs"""
+    has_media = bool(instance.image or instance.video)
+    apply_score_delta(
+        instance.author_id, -post_points(has_media, instance.is_active), "post"
+    )
+
+
+# ------------------ LIKES & COMMENTS ------------------
+def _apply_engagement_delta(post_id, delta, source):
+    state = _post_state(post_id)
+    if state:
+        author_id, is_active = state
+        if is_active:
+            apply_score_delta(author_id, delta, source)
 
 
 @receiver(post_save, sender="feed.PostLike")
 def update_score_on_like_save(sender, instance, created, **kwargs):
-    """Update post author's activity score when someone likes their post"""
-    if created and instance.post.author and hasattr(instance.post.author, "profile"):
-        instance.post.author.profile.update_activity_score()
+    """Credit the post author when someone likes their post"""
+    if created:
+        _apply_engagement_delta(instance.post_id, LIKE_POINTS, "like")
 
 
 @receiver(post_delete, sender="feed.PostLike")
 def update_score_on_like_delete(sender, instance, **kwargs):
-    """Update post author's activity score when a like is removed"""
-    if instance.post.author and hasattr(instance.post.author, "profile"):
-        instance.post.author.profile.update_activity_score()
+    """Take the point back when a like is removed"""
+    _apply_engagement_delta(instance.post_id, -LIKE_POINTS, "like")
 
 
 @receiver(post_save, sender="feed.Comment")
 def update_score_on_comment_save(sender, instance, created, **kwargs):
-    """Update post author's activity score when someone comments on their post"""
-    if created and instance.post.author and hasattr(instance.post.author, "profile"):
-        instance.post.author.profile.update_activity_score()
+    """Credit the post author when someone comments on their post"""
+    if created:
+        _apply_engagement_delta(instance.post_id, COMMENT_POINTS, "comment")
 
 
 @receiver(post_delete, sender="feed.Comment")
 def update_score_on_comment_delete(sender, instance, **kwargs):
-    """Update post author's activity score when a comment is deleted"""
-    if instance.post.author and hasattr(instance.post.author, "profile"):
-        instance.post.author.profile.update_activity_score()
+    """Take the points back when a comment is deleted"""
+    _apply_engagement_delta(instance.post_id, -COMMENT_POINTS, "comment")
+
+
+# ------------------ NEW FEED POSTS ------------------
+def _feed_post_state(post_id):
+    """(author_id, is_active, post_type) of a FeedPost, or None if it is gone"""
+    from feed.models import FeedPost
+
+    return (
+        FeedPost.objects.filter(pk=post_id)
+        .values_list("author_id", "is_active", "post_type")
+        .first()
+    )
+
+
+@receiver(pre_save, sender="feed.FeedPost")
+def remember_feed_post_score_state(sender, instance, **kwargs):
+    """Stash the stored state so post_save can diff it"""
+    instance._score_before = None
+    if instance.pk and not instance._state.adding:
+        old = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list(
+                "author_id",
+                "is_active",
+                "post_type",
+                "like_count",
+                "comment_count",
+                "has_media",
+            )
+            .first()
+        )
+        if old:
+            # has_media is owned by the PostMedia handlers; never save a stale copy
+            instance.has_media = old[5]
+            instance._score_before = old[:5]
+
+
+@receiver(post_save, sender="feed.FeedPost")
+def update_score_on_feed_post_save(sender, instance, created, **kwargs):
+    """Credit a new FeedPost, or apply the difference when it changes"""
+    has_media = instance.has_media
+    new_points = feed_post_points(instance.post_type, has_media, instance.is_active)
+
+    before = getattr(instance, "_score_before", None)
+    if created or before is None:
+        apply_score_delta(instance.author_id, new_points, "post")
+        return
+
+    old_author_id, old_active, old_type, like_count, comment_count = before
+    old_points = feed_post_points(old_type, has_media, old_active)
+
+    if old_author_id != instance.author_id or old_active != instance.is_active:
+        # Use the stored engagement counters instead of counting rows
+        engagement = like_count * LIKE_POINTS + comment_count * COMMENT_POINTS
+        if old_active:
+            old_points += engagement
+        if instance.is_active:
+            new_points += engagement
+        apply_score_delta(old_author_id, -old_points, "post")
+        apply_score_delta(instance.author_id, new_points, "post")
+    else:
+        apply_score_delta(instance.author_id, new_points - old_points, "post")
+
+
+@receiver(post_delete, sender="feed.FeedPost")
+def update_score_on_feed_post_delete(sender, instance, **kwargs):
+    """Remove the post's own points; media, likes and comments remove theirs"""
+    # Cascaded PostMedia rows are deleted first and already took back the media
+    # bonus, so what is left is the text-only value
+    apply_score_delta(
+        instance.author_id,
+        -feed_post_points(instance.post_type, False, instance.is_active),
+        "post",
+    )
+
+
+def _set_media_flag(post_id, has_media):
+    """
+    Flip FeedPost.has_media and adjust the author's score if it changed.
+
+    The conditional UPDATE only matches when the flag actually flips, so
+    several files attached or removed at once move the score exactly once.
+    """
+    from feed.models import FeedPost
+
+    flipped = FeedPost.objects.filter(pk=post_id, has_media=not has_media).update(
+        has_media=has_media
+    )
+    if not flipped:
+        return
+
+    state = _feed_post_state(post_id)
+    if state:
+        author_id, is_active, post_type = state
+        if is_active and post_type == "normal":
+            bonus = MEDIA_POST_POINTS - TEXT_POST_POINTS
+            apply_score_delta(author_id, bonus if has_media else -bonus, "post")
+
+
+@receiver(post_save, sender="feed.PostMedia")
+def update_score_on_media_save(sender, instance, created, **kwargs):
+    """Upgrade a normal post to a media post when its first file is attached"""
+    if created:
+        _set_media_flag(instance.post_id, True)
+
+
+@receiver(post_delete, sender="feed.PostMedia")
+def update_score_on_media_delete(sender, instance, **kwargs):
+    """Downgrade a normal post to text-only when its last file is removed"""
+    if not sender.objects.filter(post_id=instance.post_id).exists():
+        _set_media_flag(instance.post_id, False)
+
+
+def _apply_feed_engagement_delta(post_id, delta, source):
+    state = _feed_post_state(post_id)
+    if state:
+        author_id, is_active, _ = state
+        if is_active:
+            apply_score_delta(author_id, delta, source)
+
+
+@receiver(post_save, sender="feed.PostLikeNew")
+def update_score_on_feed_like_save(sender, instance, created, **kwargs):
+    """Credit the post author when someone likes their post"""
+    if created:
+        _apply_feed_engagement_delta(instance.post_id, LIKE_POINTS, "like")
+
+
+@receiver(post_delete, sender="feed.PostLikeNew")
+def update_score_on_feed_like_delete(sender, instance, **kwargs):
+    """Take the point back when a like is removed"""
+    _apply_feed_engagement_delta(instance.post_id, -LIKE_POINTS, "like")
+
+
+@receiver(post_save, sender="feed.PostComment")
+def update_score_on_feed_comment_save(sender, instance, created, **kwargs):
+    """Credit the post author when someone comments on their post"""
+    if created:
+        _apply_feed_engagement_delta(instance.post_id, COMMENT_POINTS, "comment")
+
+
+@receiver(post_delete, sender="feed.PostComment")
+def update_score_on_feed_comment_delete(sender, instance, **kwargs):
+    """Take the points back when a comment is deleted"""
+    _apply_feed_engagement_delta(instance.post_id, -COMMENT_POINTS, "comment")
+
+
+# ------------------ BLOGS ------------------
+@receiver(pre_save, sender="community.Blog")
+def remember_blog_score_state(sender, instance, **kwargs):
+    """Stash the stored author/status so post_save can diff it"""
+    instance._score_before = None
+    if instance.pk and not instance._state.adding:
+        instance._score_before = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("author_id", "status")
+            .first()
+        )
 
 
 @receiver(post_save, sender="community.Blog")
 def update_score_on_blog_save(sender, instance, created, **kwargs):
-    """Update author's activity score when a blog is created or updated"""
-    if instance.author and hasattr(instance.author, "profile"):
-        instance.author.profile.update_activity_score()
+    """Credit published blogs; adjust when a blog is (un)published or reassigned"""
+    before = getattr(instance, "_score_before", None)
+    if before:
+        old_author_id, old_status = before
+        if (old_author_id, old_status) == (instance.author_id, instance.status):
+            return
+        apply_score_delta(old_author_id, -blog_points(old_status), "blog")
+    apply_score_delta(instance.author_id, blog_points(instance.status), "blog")
 
 
 @receiver(post_delete, sender="community.Blog")
 def update_score_on_blog_delete(sender, instance, **kwargs):
-    """Update author's activity score when a blog is deleted"""
-    if instance.author and hasattr(instance.author, "profile"):
-        instance.author.profile.update_activity_score()
+    """Remove the points of a deleted published blog"""
+    apply_score_delta(instance.author_id, -blog_points(instance.status), "blog")
+
+
+# ------------------ PROJECTS ------------------
+def _is_member(project, user_id):
+    return project.members.filter(pk=user_id).exists()
+
+
+@receiver(pre_save, sender="community.Project")
+def remember_project_leader(sender, instance, **kwargs):
+    """Stash the stored leader so post_save can move the points on a change"""
+    instance._leader_before = None
+    if instance.pk and not instance._state.adding:
+        instance._leader_before = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("leader_id", flat=True)
+            .first()
+        )
 
 
 @receiver(post_save, sender="community.Project")
 def update_score_on_project_save(sender, instance, created, **kwargs):
-    """Update leader's and members' activity scores when a project is created or updated"""
-    if instance.leader and hasattr(instance.leader, "profile"):
-        instance.leader.profile.update_activity_score()
+    """Credit the leader of a new project, or move the points to a new leader"""
+    if created:
+        apply_score_delta(instance.leader_id, PROJECT_POINTS, "project")
+        return
+
+    old_leader_id = getattr(instance, "_leader_before", None)
+    if old_leader_id == instance.leader_id:
+        return
+
+    # A project counts once per user, whether they lead it or are a member
+    if old_leader_id and not _is_member(instance, old_leader_id):
+        apply_score_delta(old_leader_id, -PROJECT_POINTS, "project")
+    if instance.leader_id and not _is_member(instance, instance.leader_id):
+        apply_score_delta(instance.leader_id, PROJECT_POINTS, "project")
 
 
-@receiver(post_delete, sender="community.Project")
+@receiver(pre_delete, sender="community.Project")
 def update_score_on_project_delete(sender, instance, **kwargs):
-    """Update leader's and members' activity scores when a project is deleted"""
-    if instance.leader and hasattr(instance.leader, "profile"):
-        instance.leader.profile.update_activity_score()
+    """Remove the project's points from its leader and members"""
+    # Runs before deletion: the membership rows are gone by post_delete
+    user_ids = set(instance.members.values_list("pk", flat=True))
+    if instance.leader_id:
+        user_ids.add(instance.leader_id)
+
+    for user_id in user_ids:
+        apply_score_delta(user_id, -PROJECT_POINTS, "project")
+
+
+def update_project_members_scores(sender, instance, action, reverse, pk_set, **kwargs):
+    """Credit or debit users as they are added to or removed from projects"""
+    from community.models import Project
+
+    if action in ("pre_remove", "pre_clear"):
+        # Record who is actually a member before the rows disappear
+        memberships = sender.objects.all()
+        if reverse:
+            memberships = memberships.filter(user_id=instance.pk)
+            if pk_set is not None:
+                memberships = memberships.filter(project_id__in=pk_set)
+        else:
+            memberships = memberships.filter(project_id=instance.pk)
+            if pk_set is not None:
+                memberships = memberships.filter(user_id__in=pk_set)
+        instance._removed_memberships = list(
+            memberships.values_list("project_id", "user_id")
+        )
+        return
+
+    if action == "post_add":
+        sign = 1
+        if reverse:
+            pairs = [(project_id, instance.pk) for project_id in pk_set]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in pk_set]
+    elif action in ("post_remove", "post_clear"):
+        sign = -1
+        pairs = getattr(instance, "_removed_memberships", [])
+        instance._removed_memberships = []
+    else:
+        return
+
+    if not pairs:
+        return
+
+    leaders = dict(
+        Project.objects.filter(pk__in={project_id for project_id, _ in pairs})
+        .values_list("pk", "leader_id")
+    )
+    for project_id, user_id in pairs:
+        # Leaders already earn the project's points
+        if leaders.get(project_id) != user_id:
+            apply_score_delta(user_id, sign * PROJECT_POINTS, "project")
+
+
+# ------------------ DSA ACTIVITY ------------------
+@receiver(pre_save, sender="community.DSAActivity")
+def remember_dsa_score_state(sender, instance, **kwargs):
+    """Stash the stored user/points so post_save can diff them"""
+    instance._score_before = None
+    if instance.pk and not instance._state.adding:
+        instance._score_before = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("user_id", "points_earned")
+            .first()
+        )
+
+
+@receiver(post_save, sender="community.DSAActivity")
+def update_score_on_dsa_save(sender, instance, created, **kwargs):
+    """Credit the points earned for a solved problem"""
+    before = getattr(instance, "_score_before", None)
+    if before:
+        old_user_id, old_points = before
+        if old_user_id == instance.user_id:
+            apply_score_delta(instance.user_id, instance.points_earned - old_points, "dsa")
+            return
+        apply_score_delta(old_user_id, -old_points, "dsa")
+    apply_score_delta(instance.user_id, instance.points_earned, "dsa")
+
+
+@receiver(post_delete, sender="community.DSAActivity")
+def update_score_on_dsa_delete(sender, instance, **kwargs):
+    """Remove the points of a deleted DSA activity"""
+    apply_score_delta(instance.user_id, -instance.points_earned, "dsa")
+
+
+# ------------------ IN-MEMORY RANKING ------------------
+# Keep accounts.ranking.score_ranking in step with the stored scores
+
 
-    # Update all members' scores
-    for member in instance.members.all():
-        if hasattr(member, "profile"):
-            member.profile.update_activity_score()
+@receiver(score_changed)
+def update_score_ranking(sender, user_id, delta=None, score=None, **kwargs):
+    if score is not None:
+        score_ranking.set_score(user_id, score)
+    else:
+        score_ranking.adjust(user_id, delta)
 
 
-def update_project_members_scores(sender, instance, action, pk_set, **kwargs):
-    """Update activity scores when project members are added or removed"""
-    if action in ["post_add", "post_remove", "post_clear"]:
-        # Update project leader's score
-        if instance.leader and hasattr(instance.leader, "profile"):
-            instance.leader.profile.update_activity_score()
+@receiver(post_save, sender="accounts.Profile")
+def track_profile_score(sender, instance, created, update_fields=None, **kwargs):
+    # Full saves of a possibly stale instance are ignored; only new profiles
+    # and explicit score writes (update_activity_score) carry a fresh value
+    if created or (update_fields and "activity_score" in update_fields):
+        score = instance.activity_score
+        transaction.on_commit(
+            lambda: score_ranking.set_score(instance.user_id, score)
+        )
 
-        # Update all members' scores
-        if pk_set:
-            from django.contrib.auth import get_user_model
 
-            User = get_user_model()
-            for user_id in pk_set:
-                try:
-                    user = User.objects.get(id=user_id)
-                    if hasattr(user, "profile"):
-                        user.profile.update_activity_score()
-                except User.DoesNotExist:
-                    pass
+@receiver(post_delete, sender="accounts.Profile")
+def untrack_profile_score(sender, instance, **kwargs):
+    score_ranking.remove(instance.user_id)
 
 
 # Connect m2m_changed signal dynamically to avoid import issues
 from django.apps import apps
-from django.db.models.signals import m2m_changed
 
 try:
     # This will be executed when the app is ready
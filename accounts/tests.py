@@ -1,3 +1,417 @@
-from django.test import TestCase
+import random
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from community.models import Blog, DSAActivity, Project
+from feed.models import FeedPost, PostComment, PostLikeNew, PostMedia
+
+from . import ranking, signals
+from .management.commands import update_activity_scores
+from .models import Profile, ScoreEvent, ScoreRollup
+from .ranking import FenwickTree, ScoreRanking
+from .scoring import (
+    apply_score_delta,
+    compute_activity_scores,
+    recompute_activity_scores,
+    record_score_events,
+)
+
+User = get_user_model()
+
+
+def expected_standings(scores):
+    """Dense-ranked standings computed the slow way"""
+    distinct = sorted(set(scores.values()), reverse=True)
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(user_id, score, distinct.index(score) + 1) for user_id, score in ordered]
+
+
+class FenwickTreeTests(SimpleTestCase):
+    def test_prefix_and_find(self):
+        tree = FenwickTree(16)
+        values = {0: 2, 3: 1, 7: 4, 15: 3}
+        for key, value in values.items():
+            tree.add(key, value)
+
+        self.assertEqual(tree.total, 10)
+        for key in range(16):
+            self.assertEqual(tree.prefix(key), sum(v for k, v in values.items() if k <= key))
+        # Smallest key whose prefix sum reaches k
+        self.assertEqual([tree.find(k) for k in (1, 2, 3, 4, 7, 8, 10)], [0, 0, 3, 7, 7, 15, 15])
+
+
+class ScoreRankingTests(SimpleTestCase):
+    def ranking(self, scores=()):
+        ranking_ = ScoreRanking(max_age=10**9)
+        ranking_._standings = ranking._Standings(list(scores))
+        ranking_._built_at = time.monotonic()
+        return ranking_
+
+    def test_dense_ranks_with_ties_by_user_id(self):
+        standings = self.ranking([(1, 10), (2, 30), (3, 10), (4, 0), (5, 30)])
+        self.assertEqual(
+            [tuple(entry) for entry in standings.top(10)],
+            [(2, 30, 1), (5, 30, 1), (1, 10, 2), (3, 10, 2), (4, 0, 3)],
+        )
+        self.assertEqual(standings.rank_of(3), 2)
+        self.assertEqual(standings.rank_of(99), 0)
+        self.assertEqual([entry.user_id for entry in standings.around(1, 1)], [5, 1, 3])
+
+    def test_matches_a_full_sort_through_random_changes(self):
+        standings = self.ranking()
+        scores = {}
+        rnd = random.Random(1)
+        for step in range(3000):
+            user_id = rnd.randrange(200)
+            choice = rnd.random()
+            if choice < 0.6:
+                # Scores far above the initial capacity make the trees grow
+                score = rnd.choice([0, rnd.randrange(50), rnd.randrange(5000)])
+                standings.set_score(user_id, score)
+                scores[user_id] = score
+            elif choice < 0.85 and user_id in scores:
+                delta = rnd.randrange(-30, 30)
+                standings.adjust(user_id, delta)
+                scores[user_id] = max(scores[user_id] + delta, 0)
+            else:
+                standings.remove(user_id)
+                scores.pop(user_id, None)
+
+            if step % 97 == 0:
+                expected = expected_standings(scores)
+                self.assertEqual([tuple(entry) for entry in standings.top(len(expected) + 3)], expected)
+                for place, (user_id, _, rank) in enumerate(expected[:40]):
+                    self.assertEqual(standings.rank_of(user_id), rank)
+                    self.assertEqual(
+                        [tuple(entry) for entry in standings.around(user_id, 3)],
+                        expected[max(place - 3, 0):place + 4],
+                    )
+
+
+class ScoreRankingLoadTests(TestCase):
+    def test_loads_on_first_use(self):
+        first, second = (
+            User.objects.create_user(username=name, email=f"{name}@example.com", password="pass")
+            for name in ("first", "second")
+        )
+        Profile.objects.filter(user=second).update(activity_score=5)
+
+        standings = ScoreRanking()
+        self.assertEqual([entry.user_id for entry in standings.top(2)], [second.pk, first.pk])
+
+    def test_changes_during_a_load_reach_the_new_copy(self):
+        standings = ScoreRanking()
+        build = ranking._Standings
+
+        def build_while_a_score_changes(rows):
+            standings.set_score(999, 50)
+            return build(rows)
+
+        with mock.patch.object(ranking, "_Standings", side_effect=build_while_a_score_changes):
+            standings.rebuild()
+        self.assertEqual(standings.rank_of(999), 1)
+
+
+    def test_change_already_in_the_snapshot_is_not_counted_twice(self):
+        user = User.objects.create_user(username="solver", email="solver@example.com", password="pass")
+        with self.captureOnCommitCallbacks() as hooks:
+            apply_score_delta(user.pk, 5, "dsa")
+
+        standings = ScoreRanking()
+        build = ranking._Standings
+
+        def build_while_the_hook_runs(rows):
+            # Committed before the snapshot was read, announced after
+            for hook in hooks:
+                hook()
+            return build(rows)
+
+        with mock.patch.object(signals, "score_ranking", standings), mock.patch.object(
+            ranking, "_Standings", side_effect=build_while_the_hook_runs
+        ):
+            standings.rebuild()
+        self.assertEqual(tuple(standings.top(1)[0]), (user.pk, 5, 1))
+
+
+class ScoreRankingRefreshTests(TransactionTestCase):
+    def test_stale_copy_is_served_while_reloading_in_the_background(self):
+        user = User.objects.create_user(username="climber", email="climber@example.com", password="pass")
+        other = User.objects.create_user(username="leader", email="leader@example.com", password="pass")
+        Profile.objects.filter(user=other).update(activity_score=10)
+
+        standings = ScoreRanking(max_age=60)
+        self.assertEqual(standings.rank_of(user), 2)
+
+        # Changed behind the ranking's back, and its copy goes stale
+        Profile.objects.filter(user=user).update(activity_score=20)
+        standings._built_at -= 61
+
+        with mock.patch.object(standings, "_load", wraps=standings._load) as load:
+            self.assertEqual(standings.rank_of(user), 2)
+            # Wait for the background reload to finish
+            with standings._loading:
+                pass
+        load.assert_called_once()
+        self.assertEqual(standings.rank_of(user), 1)
+
+
+class ActivityScoreDeltaTests(TestCase):
+    """Scores kept by deltas must always equal a full recompute"""
+
+    def setUp(self):
+        self.author, self.fan = (
+            User.objects.create_user(username=name, email=f"{name}@example.com", password="pass")
+            for name in ("author", "fan")
+        )
+
+    def assertMatchesRecompute(self, expected=None):
+        scores = compute_activity_scores()
+        for user in (self.author, self.fan):
+            stored = Profile.objects.get(user=user).activity_score
+            self.assertEqual(stored, max(scores.get(user.pk, 0), 0), user.username)
+        if expected is not None:
+            self.assertEqual(Profile.objects.get(user=self.author).activity_score, expected)
+
+    def test_feed_post_lifecycle(self):
+        post = FeedPost.objects.create(author=self.author, post_type="normal", normal_content="Hi")
+        self.assertMatchesRecompute(2)
+
+        stale = FeedPost.objects.get(pk=post.pk)
+        PostLikeNew.objects.create(post=post, user=self.fan)
+        comment = PostComment.objects.create(post=post, author=self.fan, content="Nice")
+        PostComment.objects.create(post=post, author=self.author, content="Thanks", parent=comment)
+        PostMedia.objects.create(post=post, media_type="image", file="feed/media/photo.png")
+        self.assertMatchesRecompute(5 + 1 + 2 * 2)
+
+        stale.normal_content = "Edited"
+        stale.save()
+        self.assertMatchesRecompute(10)
+
+        stale.is_active = False
+        stale.save()
+        self.assertMatchesRecompute(0)
+
+        # Engagement on a hidden post counts once it is shown again
+        PostLikeNew.objects.create(post=post, user=self.author)
+        stale.is_active = True
+        stale.save()
+        self.assertMatchesRecompute(11)
+
+        post.delete()
+        self.assertMatchesRecompute(0)
+
+    def test_feed_post_changing_hands_moves_its_engagement(self):
+        post = FeedPost.objects.create(author=self.author, post_type="project", project_title="Rise")
+        PostLikeNew.objects.create(post=post, user=self.fan)
+        post.author = self.fan
+        post.save()
+        self.assertMatchesRecompute(0)
+        self.assertEqual(Profile.objects.get(user=self.fan).activity_score, 11)
+
+    def test_blog_lifecycle(self):
+        blog = Blog.objects.create(author=self.author, title="Draft", slug="draft", content="...")
+        self.assertMatchesRecompute(0)
+
+        blog.status = "published"
+        blog.save()
+        self.assertMatchesRecompute(10)
+
+        events = ScoreEvent.objects.count()
+        blog.title = "Typo fixed"
+        blog.save()
+        self.assertEqual(ScoreEvent.objects.count(), events)
+
+        blog.author = self.fan
+        blog.save()
+        self.assertMatchesRecompute(0)
+
+        blog.delete()
+        self.assertMatchesRecompute()
+
+    def test_dsa_lifecycle(self):
+        activity = DSAActivity.objects.create(
+            user=self.author, problem_title="Two Sum", difficulty="easy", points_earned=3
+        )
+        self.assertMatchesRecompute(3)
+
+        activity.points_earned = 8
+        activity.save()
+        self.assertMatchesRecompute(8)
+
+        activity.delete()
+        self.assertMatchesRecompute(0)
+
+    def test_recompute_repairs_drift_and_books_it(self):
+        FeedPost.objects.create(author=self.author, post_type="blog", blog_title="Notes")
+        Profile.objects.filter(user=self.author).update(activity_score=3)
+
+        self.assertEqual(recompute_activity_scores(), (2, 1))
+        self.assertMatchesRecompute(10)
+        self.assertEqual(ScoreEvent.objects.filter(user=self.author, source="adjustment").get().points, 7)
+
+
+class ActivityScoreRecomputeTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pass")
+            for i in range(4)
+        ]
+        lead, member, writer, fan = self.users
+        project = Project.objects.create(
+            title="Rise", description="A project", details="<p>Details</p>",
+            thumbnail="project_thumbnails/cover.png", leader=lead,
+        )
+        # Leading and being a member of the same project counts once
+        project.members.add(lead, member)
+        Blog.objects.create(author=writer, title="Notes", slug="notes", status="published", content="<p>Hi</p>")
+        post = FeedPost.objects.create(author=writer, post_type="normal", normal_content="Hello")
+        PostLikeNew.objects.create(post=post, user=fan)
+        PostComment.objects.create(post=post, author=fan, content="Nice")
+        DSAActivity.objects.create(user=fan, problem_title="Two Sum", difficulty="easy", points_earned=3)
+        self.expected = {lead.pk: 10, member.pk: 10, writer.pk: 10 + 2 + 1 + 2, fan.pk: 3}
+
+    def stored(self):
+        return dict(Profile.objects.values_list("user_id", "activity_score"))
+
+    def test_grouped_scores_match_the_per_user_formula(self):
+        self.assertEqual(compute_activity_scores(), self.expected)
+        for user in self.users:
+            self.assertEqual(user.profile.calculate_activity_score(), self.expected[user.pk])
+
+    def test_query_count_does_not_grow_with_users(self):
+        with CaptureQueriesContext(connection) as before:
+            compute_activity_scores()
+        for i in range(5):
+            author = User.objects.create_user(username=f"extra{i}", email=f"extra{i}@example.com", password="pass")
+            FeedPost.objects.create(author=author, post_type="blog", blog_title="More")
+        with CaptureQueriesContext(connection) as after:
+            scores = compute_activity_scores()
+        self.assertEqual(len(scores), 9)
+        self.assertEqual(len(after), len(before))
+
+    def test_id_ranges_partition_the_users(self):
+        middle = self.users[2].pk
+        first = compute_activity_scores(end_id=middle)
+        second = compute_activity_scores(start_id=middle)
+        self.assertEqual(set(first), {user.pk for user in self.users[:2]})
+        self.assertEqual({**first, **second}, self.expected)
+
+    def test_command_writes_only_changed_profiles(self):
+        Profile.objects.filter(user=self.users[0]).update(activity_score=99)
+        out = StringIO()
+        call_command("update_activity_scores", stdout=out)
+        self.assertIn("Updated 1/4 profiles", out.getvalue())
+        self.assertEqual(self.stored(), self.expected)
+
+    def test_command_updates_a_single_user(self):
+        Profile.objects.filter(user__in=self.users[:2]).update(activity_score=0)
+        out = StringIO()
+        call_command("update_activity_scores", username="user0", stdout=out)
+        self.assertIn("Updated user0: 0 → 10 points", out.getvalue())
+        self.assertEqual(self.stored()[self.users[1].pk], 0)
+
+    def test_workers_split_the_whole_id_range(self):
+        Profile.objects.update(activity_score=0)
+        ranges = []
+
+        class InlinePool:
+            """Runs each range in this process instead of a worker"""
+
+            def __init__(self, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, func, bounds):
+                ranges.extend(bounds)
+                return [recompute_activity_scores(*args) for args in ranges]
+
+        with mock.patch.object(update_activity_scores, "ProcessPoolExecutor", InlinePool), \
+                mock.patch.object(update_activity_scores.connections, "close_all"):
+            call_command("update_activity_scores", workers=2, stdout=StringIO())
+
+        self.assertEqual(len(ranges), 2)
+        self.assertEqual(ranges[0][0], self.users[0].pk)
+        self.assertEqual(ranges[-1][1], self.users[-1].pk + 1)
+        self.assertEqual(ranges[0][1], ranges[1][0])
+        self.assertEqual(self.stored(), self.expected)
+
+
+class ScoreLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", email="member@example.com", password="pass")
+
+    def score(self):
+        return Profile.objects.get(user=self.user).activity_score
+
+    def ledger(self):
+        return ScoreEvent.objects.filter(user=self.user).aggregate(total=Sum("points"))["total"] or 0
+
+    def test_deltas_are_booked_in_the_ledger_and_rollups(self):
+        apply_score_delta(self.user.pk, 10, "blog")
+        apply_score_delta(self.user.pk, 2, "comment")
+        apply_score_delta(self.user.pk, -1, "like")
+
+        self.assertEqual(self.score(), 11)
+        self.assertEqual(
+            list(ScoreEvent.objects.filter(user=self.user).order_by("pk").values_list("source", "points")),
+            [("blog", 10), ("comment", 2), ("like", -1)],
+        )
+        self.assertEqual(
+            list(ScoreRollup.objects.filter(user=self.user).values_list("day", "points")),
+            [(timezone.localdate(), 11)],
+        )
+
+    def test_clamped_delta_books_only_what_was_applied(self):
+        apply_score_delta(self.user.pk, 3, "dsa")
+        apply_score_delta(self.user.pk, -5, "dsa")
+        apply_score_delta(self.user.pk, -2, "dsa")  # already at zero: nothing to book
+
+        self.assertEqual(self.score(), 0)
+        self.assertEqual(self.ledger(), 0)
+        self.assertEqual(ScoreEvent.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(ScoreRollup.objects.get(user=self.user).points, 0)
+
+    def test_deleting_a_post_books_no_debit_past_zero(self):
+        post = FeedPost.objects.create(author=self.user, post_type="normal", normal_content="Hi")
+        Profile.objects.filter(user=self.user).update(activity_score=0)
+        post.delete()
+        self.assertEqual(self.score(), 0)
+        self.assertEqual(self.ledger(), 2)  # the credit, and no debit past zero
+
+    def test_rollups_split_by_local_day(self):
+        now = timezone.now()
+        record_score_events([(self.user.pk, 4, "dsa")], when=now - timedelta(days=1))
+        record_score_events([(self.user.pk, 5, "dsa"), (self.user.pk, 1, "like")], when=now)
+
+        self.assertEqual(
+            dict(ScoreRollup.objects.filter(user=self.user).values_list("day", "points")),
+            {timezone.localdate(now - timedelta(days=1)): 4, timezone.localdate(now): 6},
+        )
+
+    def test_rebuild_reseeds_a_ledger_that_sums_to_the_score(self):
+        FeedPost.objects.create(author=self.user, post_type="project", project_title="Rise")
+        Profile.objects.filter(user=self.user).update(activity_score=13)
+
+        call_command("rebuild_score_ledger", stdout=StringIO())
+
+        self.assertEqual(self.ledger(), 13)
+        self.assertEqual(
+            dict(ScoreEvent.objects.filter(user=self.user).values_list("source", "points")),
+            {"backfill": 10, "adjustment": 3},
+        )
+        self.assertEqual(ScoreRollup.objects.filter(user=self.user).aggregate(total=Sum("points"))["total"], 13)
@@ -131,18 +131,12 @@ def profile_view(request, username=None):
     except:
         user_projects = []
 
-    # Get leaderboard data - top 10 users by activity score
+    # Top 10 and the user's rank come from the in-memory score ranking
     try:
-        leaderboard_users = Profile.objects.select_related("user").order_by(
-            "-activity_score"
-        )[:10]
-        # Find current user's rank
-        user_rank = (
-            Profile.objects.filter(
-                activity_score__gt=profile_user.profile.activity_score
-            ).count()
-            + 1
-        )
+        from community import leaderboards
+
+        leaderboard_users = leaderboards.top("all_time", 10)
+        user_rank = leaderboards.rank_of(profile_user, "all_time")
     except:
         leaderboard_users = []
         user_rank = 0
@@ -0,0 +1,122 @@
+# community/catalog.py
+
+from django.db.models import Count
+from django.http import QueryDict
+
+from .models import Project, Skill
+
+# Filters the project list accepts as query parameters. "category" and
+# "type" pick one value; "skill" may be repeated and narrows to projects
+# that have every listed skill.
+FILTER_PARAMS = ("category", "type", "skill")
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_filters(params):
+    """Valid project filters from request.GET, ignoring anything malformed"""
+    types = dict(Project.PROJECT_TYPE)
+    project_type = params.get("type")
+    skills = sorted({pk for pk in map(_int, params.getlist("skill")) if pk is not None})
+    return {
+        "category": _int(params.get("category")),
+        "type": project_type if project_type in types else None,
+        "skill": skills,
+    }
+
+
+def filter_projects(queryset, filters, ignore=None):
+    """Apply the filters to a Project queryset, leaving out the `ignore` facet"""
+    if filters["category"] is not None and ignore != "category":
+        queryset = queryset.filter(category_id=filters["category"])
+    if filters["type"] is not None and ignore != "type":
+        queryset = queryset.filter(project_type=filters["type"])
+    if ignore != "skill":
+        for skill_id in filters["skill"]:
+            queryset = queryset.filter(skills=skill_id)
+    return queryset
+
+
+def query_string(filters, **changes):
+    """URL query for the filters with some values replaced (None drops one)"""
+    values = {**filters, **changes}
+    query = QueryDict(mutable=True)
+    for param in FILTER_PARAMS:
+        value = values[param]
+        if param == "skill":
+            query.setlist(param, [str(pk) for pk in value])
+        elif value is not None:
+            query[param] = str(value)
+    return query.urlencode()
+
+
+def _option(filters, param, value, label, count):
+    selected = (
+        value in filters["skill"] if param == "skill" else filters[param] == value
+    )
+    if param == "skill":
+        skills = [pk for pk in filters["skill"] if pk != value] if selected else [*filters["skill"], value]
+        query = query_string(filters, skill=sorted(skills))
+    else:
+        query = query_string(filters, **{param: None if selected else value})
+    return {
+        "value": value,
+        "label": label,
+        "count": count,
+        "selected": selected,
+        "query": query,
+    }
+
+
+def facets(filters):
+    """
+    Options for each filter with the number of projects each would show,
+    one grouped query per facet.
+
+    Category and type counts ignore their own filter, so picking another
+    value shows what switching to it would give; skill counts apply every
+    filter, since skills narrow further.
+    """
+    projects = Project.objects.all()
+
+    by_category = (
+        filter_projects(projects, filters, ignore="category")
+        .filter(category__isnull=False)
+        .values_list("category_id", "category__name")
+        .annotate(count=Count("pk"))
+        .order_by("category__name")
+    )
+    by_type = (
+        filter_projects(projects, filters, ignore="type")
+        .values_list("project_type")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    by_skill = (
+        Skill.objects.filter(project__in=filter_projects(projects, filters).values("pk"))
+        .values_list("pk", "name")
+        .annotate(count=Count("project"))
+        .order_by("-count", "name")
+    )
+
+    type_counts = dict(by_type)
+    return {
+        "category": [
+            _option(filters, "category", pk, name, count)
+            for pk, name, count in by_category
+        ],
+        "type": [
+            _option(filters, "type", value, label, type_counts[value])
+            for value, label in Project.PROJECT_TYPE
+            if value in type_counts
+        ],
+        "skill": [
+            _option(filters, "skill", pk, name, count)
+            for pk, name, count in by_skill
+        ],
+    }
@@ -0,0 +1,196 @@
+# community/leaderboards.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from accounts.ranking import score_ranking
+
+from .models import Leaderboard
+
+PERIODS = [period for period, _ in Leaderboard.PERIOD_CHOICES]
+
+
+def period_start(period, now=None):
+    """Local start of the current day/week/month; None for all_time"""
+    now = timezone.localtime(now)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "daily":
+        return midnight
+    if period == "weekly":
+        return midnight - timedelta(days=midnight.weekday())
+    if period == "monthly":
+        return midnight.replace(day=1)
+    if period == "all_time":
+        return None
+    raise ValueError(f"Unknown leaderboard period: {period}")
+
+
+def period_points(period, now=None):
+    """{user_id: points} for every user with a profile"""
+    from accounts.models import Profile, ScoreRollup
+
+    if period == "all_time":
+        # The stored score is kept current by the scoring signals
+        return dict(Profile.objects.values_list("user_id", "activity_score"))
+
+    # Range sum over the per-day rollups of the score ledger
+    scores = dict(
+        ScoreRollup.objects.filter(day__gte=period_start(period, now).date())
+        .order_by()
+        .values("user")
+        .annotate(total=Sum("points"))
+        .values_list("user", "total")
+    )
+    return {
+        user_id: max(scores.get(user_id, 0), 0)
+        for user_id in Profile.objects.values_list("user_id", flat=True)
+    }
+
+
+def dense_ranks(points):
+    """
+    Order {user_id: points} into [(user_id, points, rank)].
+
+    Ranks are dense: equal points share a rank and the next score down gets
+    the following rank, with ties listed by user id.
+    """
+    ordered = sorted(points.items(), key=lambda item: (-item[1], item[0]))
+    ranked = []
+    rank = 0
+    previous = None
+    for user_id, score in ordered:
+        if score != previous:
+            rank += 1
+            previous = score
+        ranked.append((user_id, score, rank))
+    return ranked
+
+
+def build_leaderboard(period, now=None, batch_size=1000):
+    """
+    Materialize one period's standings into Leaderboard rows.
+
+    Points come from grouped aggregates and ranks are assigned in memory, so
+    the cost is a handful of queries regardless of the number of users. Only
+    rows whose points or rank moved are rewritten.
+    Returns (created, updated, deleted).
+    """
+    ranked = dense_ranks(period_points(period, now))
+
+    with transaction.atomic():
+        existing = {
+            entry.user_id: entry
+            for entry in Leaderboard.objects.filter(period=period).only(
+                "pk", "user_id", "points", "rank"
+            )
+        }
+
+        to_create = []
+        to_update = []
+        for user_id, points, rank in ranked:
+            entry = existing.pop(user_id, None)
+            if entry is None:
+                to_create.append(
+                    Leaderboard(user_id=user_id, period=period, points=points, rank=rank)
+                )
+            elif entry.points != points or entry.rank != rank:
+                entry.points = points
+                entry.rank = rank
+                to_update.append(entry)
+
+        # Rows left over belong to users who no longer have a profile
+        stale = [entry.pk for entry in existing.values()]
+        for start in range(0, len(stale), batch_size):
+            Leaderboard.objects.filter(pk__in=stale[start:start + batch_size]).delete()
+
+        Leaderboard.objects.bulk_create(to_create, batch_size=batch_size)
+        # bulk_update skips auto_now, so stamp the rows explicitly
+        stamp = timezone.now()
+        for entry in to_update:
+            entry.last_updated = stamp
+        Leaderboard.objects.bulk_update(
+            to_update, ["points", "rank", "last_updated"], batch_size=batch_size
+        )
+
+    return len(to_create), len(to_update), len(stale)
+
+
+def top_entries(period="all_time", limit=10):
+    """The highest-ranked rows of a period, with user and profile loaded"""
+    return list(
+        Leaderboard.objects.filter(period=period)
+        .select_related("user", "user__profile")
+        .order_by("rank", "user_id")[:limit]
+    )
+
+
+def rank_for(user, period="all_time"):
+    """A user's stored rank in a period, or 0 if it has not been built yet"""
+    rank = (
+        Leaderboard.objects.filter(user=user, period=period)
+        .values_list("rank", flat=True)
+        .first()
+    )
+    return rank or 0
+
+
+def around_entries(user, period, k=5):
+    """Stored rows within k ranks of a user"""
+    rank = rank_for(user, period)
+    if not rank:
+        return []
+    return list(
+        Leaderboard.objects.filter(
+            period=period, rank__gte=max(rank - k, 1), rank__lte=rank + k
+        )
+        .select_related("user", "user__profile")
+        .order_by("rank", "user_id")[: 2 * k + 1]
+    )
+
+
+def _live_entries(standings):
+    """Unsaved all_time Leaderboard rows for in-memory standings"""
+    from django.contrib.auth import get_user_model
+
+    users = get_user_model().objects.select_related("profile").in_bulk(
+        [standing.user_id for standing in standings]
+    )
+    return [
+        Leaderboard(
+            user=users[standing.user_id],
+            period="all_time",
+            points=standing.points,
+            rank=standing.rank,
+        )
+        for standing in standings
+        if standing.user_id in users
+    ]
+
+
+def top(period="all_time", k=10):
+    """
+    The first k entries of a period's standings.
+
+    all_time is served live by the in-memory score ranking; the windowed
+    periods are read from the rows materialized by build_leaderboard().
+    """
+    if period == "all_time":
+        return _live_entries(score_ranking.top(k))
+    return top_entries(period, limit=k)
+
+
+def around(user, period="all_time", k=5):
+    """Entries within k places of a user in a period's standings"""
+    if period == "all_time":
+        return _live_entries(score_ranking.around(user, k))
+    return around_entries(user, period, k)
+
+
+def rank_of(user, period="all_time"):
+    """A user's dense rank in a period, or 0 if they are not ranked"""
+    if period == "all_time":
+        return score_ranking.rank_of(user)
+    return rank_for(user, period)
@@ -0,0 +1,38 @@
+# community/management/commands/build_leaderboards.py
+
+from django.core.management.base import BaseCommand
+
+from community.leaderboards import PERIODS, build_leaderboard
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized daily, weekly, monthly and all-time leaderboards"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            choices=PERIODS,
+            action="append",
+            help="Only rebuild the given period (may be repeated)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows written per bulk statement",
+        )
+
+    def handle(self, *args, **options):
+        periods = options.get("period") or PERIODS
+
+        for period in periods:
+            created, updated, deleted = build_leaderboard(
+                period, batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                f"{period}: {created} created, {updated} updated, {deleted} removed"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nCompleted! Rebuilt {len(periods)} leaderboard(s).")
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:41
+
+import riseapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blog',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='blog_thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='post_files/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='post_images/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='post_videos/'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='thumbnail',
+            field=models.ImageField(storage=riseapp.storage.ContentAddressedStorage(), upload_to='project_thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='projectimage',
+            name='image',
+            field=models.ImageField(storage=riseapp.storage.ContentAddressedStorage(), upload_to='project_images/'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0004_blob_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['status', '-published_at', '-created_at'], name='blog_status_published_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from tinymce.models import HTMLField
+from riseapp.storage import blob_storage
 from django.utils import timezone
 from django.conf import settings  # use settings.AUTH_USER_MODEL
 
@@ -52,6 +53,9 @@ class Leaderboard(models.Model):
     class Meta:
         unique_together = ('user', 'period')
         ordering = ['-points', 'rank']
+        indexes = [
+            models.Index(fields=['period', 'rank'], name='leaderboard_period_rank_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.period} - {self.points} pts"
@@ -70,13 +74,20 @@ class Blog(models.Model):
     slug = models.SlugField(unique=True, max_length=255)
     excerpt = models.TextField(blank=True, null=True)
     content = HTMLField()
-    thumbnail = models.ImageField(upload_to="blog_thumbnails/", blank=True, null=True)
+    thumbnail = models.ImageField(upload_to="blog_thumbnails/", storage=blob_storage, blank=True, null=True)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     published_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="blogs")
 
+    class Meta:
+        indexes = [
+            # Serves the paginated published list (see views.blogs_list)
+            models.Index(fields=["status", "-published_at", "-created_at"], name="blog_status_published_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -141,7 +152,8 @@ class Project(models.Model):
 
     title = models.CharField(max_length=255)
     category = models.ForeignKey(ProjectCategory, on_delete=models.SET_NULL, null=True, blank=True)
-    thumbnail = models.ImageField(upload_to="project_thumbnails/")
+    thumbnail = models.ImageField(upload_to="project_thumbnails/", storage=blob_storage)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField()
     details = HTMLField()
     skills = models.ManyToManyField(Skill, blank=True)
@@ -159,7 +171,7 @@ class Project(models.Model):
 
 class ProjectImage(models.Model):
     project = models.ForeignKey(Project, related_name="images", on_delete=models.CASCADE)
-    image = models.ImageField(upload_to="project_images/")
+    image = models.ImageField(upload_to="project_images/", storage=blob_storage)
 
     def __str__(self):
         return f"Image for {self.project.title}"
@@ -170,9 +182,9 @@ class Post(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="posts", on_delete=models.CASCADE)
     caption = models.TextField(blank=True, null=True)
     hashtags = models.CharField(max_length=255, blank=True, null=True, help_text="Comma-separated hashtags e.g. #dsa,#coding,#python")
-    image = models.ImageField(upload_to="post_images/", blank=True, null=True)
-    video = models.FileField(upload_to="post_videos/", blank=True, null=True)
-    file = models.FileField(upload_to="post_files/", blank=True, null=True)
+    image = models.ImageField(upload_to="post_images/", storage=blob_storage, blank=True, null=True)
+    video = models.FileField(upload_to="post_videos/", storage=blob_storage, blank=True, null=True)
+    file = models.FileField(upload_to="post_files/", storage=blob_storage, blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
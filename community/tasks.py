@@ -0,0 +1,16 @@
+# community/tasks.py
+
+from datetime import timedelta
+
+from django.conf import settings
+
+from riseapp.jobs import task
+
+from .leaderboards import PERIODS, build_leaderboard
+
+
+@task(every=timedelta(seconds=getattr(settings, "LEADERBOARD_REBUILD_INTERVAL", 900)))
+def build_leaderboards():
+    """Rebuild the daily, weekly, monthly and all-time leaderboards"""
+    for period in PERIODS:
+        build_leaderboard(period)
@@ -1,3 +1,214 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from accounts.scoring import record_score_events
+
+from . import catalog
+from .leaderboards import build_leaderboard
+from .models import Blog, Leaderboard, Project, ProjectCategory, Skill
+from .views import BLOGS_PER_PAGE, PROJECTS_PER_PAGE
+
+User = get_user_model()
+
+
+class BlogListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author = User.objects.create_user(username="writer", email="writer@example.com", password="pass")
+        self.url = reverse("community:blogs_list")
+        self.now = timezone.now()
+
+    def blogs(self, count, start=0):
+        return [
+            Blog.objects.create(
+                author=self.author, title=f"Blog {i}", slug=f"blog-{i}", status="published",
+                published_at=self.now - timedelta(hours=i), content=f"<p>Body {i}</p>",
+            )
+            for i in range(start, start + count)
+        ]
+
+    def page(self, **params):
+        return self.client.get(self.url, params).context["blogs"]
+
+    def test_pages_hold_published_blogs_newest_first(self):
+        blogs = self.blogs(BLOGS_PER_PAGE + 2)
+        Blog.objects.create(author=self.author, title="Draft", slug="draft", content="<p>Soon</p>")
+
+        first = self.page()
+        self.assertEqual(list(first), blogs[:BLOGS_PER_PAGE])
+        self.assertEqual(first.paginator.count, BLOGS_PER_PAGE + 2)
+        self.assertEqual(list(self.page(page=2)), blogs[BLOGS_PER_PAGE:])
+        # Out-of-range and malformed pages fall back to a real page
+        self.assertEqual(self.page(page=99).number, 2)
+        self.assertEqual(self.page(page="last-one").number, 1)
+
+    def test_cards_never_load_the_blog_body(self):
+        self.blogs(3)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        blog_queries = [q["sql"] for q in queries if 'FROM "community_blog"' in q["sql"]]
+        self.assertTrue(blog_queries)
+        for sql in blog_queries:
+            self.assertNotIn('"community_blog"."content"', sql)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.client.force_login(self.author)
+        self.blogs(1)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(self.url)
+        self.blogs(BLOGS_PER_PAGE - 1, start=1)
+        with CaptureQueriesContext(connection) as full:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["blogs"]), BLOGS_PER_PAGE)
+        self.assertEqual(len(full), len(one))
+
+
+class ProjectCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.leader = User.objects.create_user(username="leader", email="leader@example.com", password="pass")
+        self.web, self.games = (ProjectCategory.objects.create(name=name) for name in ("Web", "Games"))
+        self.python, self.django, self.rust = (
+            Skill.objects.create(name=name) for name in ("Python", "Django", "Rust")
+        )
+        self.site = self.project("Site", self.web, "team", self.python, self.django)
+        self.api = self.project("API", self.web, "individual", self.python)
+        self.engine = self.project("Engine", self.games, "team", self.rust)
+        self.url = reverse("community:projects_list")
+
+    def project(self, title, category=None, project_type="individual", *skills):
+        project = Project.objects.create(
+            title=title, category=category, project_type=project_type,
+            description="A project", details="<p>Details</p>",
+            thumbnail="project_thumbnails/cover.png", leader=self.leader,
+        )
+        project.skills.set(skills)
+        return project
+
+    def filters(self, query):
+        return catalog.parse_filters(QueryDict(query))
+
+    def titles(self, query):
+        projects = catalog.filter_projects(Project.objects.all(), self.filters(query))
+        return sorted(projects.values_list("title", flat=True))
+
+    def test_malformed_filters_are_ignored(self):
+        self.assertEqual(
+            self.filters("category=web&type=solo&skill=3&skill=x&skill=1&skill=3"),
+            {"category": None, "type": None, "skill": [1, 3]},
+        )
+
+    def test_filters_combine_and_skills_narrow(self):
+        self.assertEqual(self.titles(f"category={self.web.pk}"), ["API", "Site"])
+        self.assertEqual(self.titles(f"category={self.web.pk}&type=team"), ["Site"])
+        self.assertEqual(self.titles(f"skill={self.python.pk}"), ["API", "Site"])
+        self.assertEqual(self.titles(f"skill={self.python.pk}&skill={self.django.pk}"), ["Site"])
+
+    def test_facet_counts(self):
+        facets = catalog.facets(self.filters(f"category={self.web.pk}"))
+        counts = {name: [(o["label"], o["count"]) for o in options] for name, options in facets.items()}
+
+        # Categories ignore their own filter, the other facets apply it
+        self.assertEqual(counts["category"], [("Games", 1), ("Web", 2)])
+        self.assertEqual(counts["type"], [("Individual", 1), ("Team", 1)])
+        self.assertEqual(counts["skill"], [("Python", 2), ("Django", 1)])
+
+        web = facets["category"][1]
+        self.assertTrue(web["selected"])
+        self.assertEqual(web["query"], "")
+        self.assertEqual(facets["skill"][1]["query"], f"category={self.web.pk}&skill={self.django.pk}")
+
+    def test_page_shows_the_filtered_projects(self):
+        response = self.client.get(self.url, {"type": "team"})
+        self.assertEqual([p.title for p in response.context["projects"]], ["Engine", "Site"])
+        self.assertTrue(response.context["filtered"])
+        self.assertEqual(response.context["query_string"], "type=team")
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.client.force_login(self.leader)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for i in range(PROJECTS_PER_PAGE):
+            self.project(f"More {i}", self.games, "team", self.rust, self.python)
+        with CaptureQueriesContext(connection) as full:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context["projects"]), PROJECTS_PER_PAGE)
+        self.assertEqual(len(full), len(few))
+
+
+class LeaderboardBuildTests(TestCase):
+    # A Wednesday: the week started on the 12th, the month on the 1st
+    NOW = datetime(2026, 10, 14, 12, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.ada, self.bob, self.cy = (
+            User.objects.create_user(username=name, email=f"{name}@example.com", password="pass")
+            for name in ("ada", "bob", "cy")
+        )
+        self.earn(self.ada, 5, days_ago=0)
+        self.earn(self.ada, 7, days_ago=3)
+        self.earn(self.ada, 20, days_ago=14)
+        self.earn(self.bob, 5, days_ago=0)
+        self.earn(self.bob, 4, days_ago=1)
+        for user, score in ((self.ada, 32), (self.bob, 9)):
+            Profile.objects.filter(user=user).update(activity_score=score)
+
+    def earn(self, user, points, days_ago):
+        record_score_events([(user.pk, points, "dsa")], when=self.NOW - timedelta(days=days_ago))
+
+    def rows(self, period):
+        return list(
+            Leaderboard.objects.filter(period=period)
+            .order_by("rank", "user_id")
+            .values_list("user__username", "points", "rank")
+        )
+
+    def test_each_period_sums_its_own_window(self):
+        for period in ("daily", "weekly", "monthly", "all_time"):
+            self.assertEqual(build_leaderboard(period, now=self.NOW), (3, 0, 0))
+
+        # Ties share a rank and the next score takes the following one
+        self.assertEqual(self.rows("daily"), [("ada", 5, 1), ("bob", 5, 1), ("cy", 0, 2)])
+        self.assertEqual(self.rows("weekly"), [("bob", 9, 1), ("ada", 5, 2), ("cy", 0, 3)])
+        self.assertEqual(self.rows("monthly"), [("ada", 12, 1), ("bob", 9, 2), ("cy", 0, 3)])
+        self.assertEqual(self.rows("all_time"), [("ada", 32, 1), ("bob", 9, 2), ("cy", 0, 3)])
+
+    def test_rebuild_rewrites_only_rows_that_moved(self):
+        build_leaderboard("daily", now=self.NOW)
+        self.assertEqual(build_leaderboard("daily", now=self.NOW), (0, 0, 0))
+
+        bob = Leaderboard.objects.get(user=self.bob, period="daily")
+        self.earn(self.cy, 3, days_ago=0)
+        self.assertEqual(build_leaderboard("daily", now=self.NOW), (0, 1, 0))
+        self.assertEqual(self.rows("daily"), [("ada", 5, 1), ("bob", 5, 1), ("cy", 3, 2)])
+        self.assertEqual(Leaderboard.objects.get(pk=bob.pk).last_updated, bob.last_updated)
+        self.assertGreater(
+            Leaderboard.objects.get(user=self.cy, period="daily").last_updated, bob.last_updated
+        )
+
+    def test_users_without_a_profile_drop_out(self):
+        build_leaderboard("weekly", now=self.NOW)
+        Profile.objects.filter(user=self.bob).delete()
+
+        self.assertEqual(build_leaderboard("weekly", now=self.NOW), (0, 2, 1))
+        self.assertEqual(self.rows("weekly"), [("ada", 5, 1), ("cy", 0, 2)])
 
-# Create your tests here.
+    def test_command_rebuilds_the_requested_periods(self):
+        out = StringIO()
+        call_command("build_leaderboards", period=["all_time"], stdout=out)
+        self.assertIn("all_time: 3 created, 0 updated, 0 removed", out.getvalue())
+        self.assertEqual(self.rows("all_time")[0], ("ada", 32, 1))
+        self.assertFalse(Leaderboard.objects.exclude(period="all_time").exists())
@@ -7,6 +7,9 @@ urlpatterns = [
     path("blogs/", views.blogs_list, name="blogs_list"),
     path("blogs/<slug:slug>/", views.blog_detail, name="blog_detail"),
     path("projects/", views.projects_list, name="projects_list"),
+    path("projects/<int:pk>/", views.project_detail, name="project_detail"),
     path("activities/", views.activities_list, name="activities_list"),
     path("resources/", views.resources_list, name="resources_list"),
+    path("leaderboard/", views.leaderboard, name="leaderboard"),
+    path("api/leaderboard/", views.leaderboard_api, name="leaderboard_api"),
 ]
@@ -1,20 +1,49 @@
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
-from .models import Blog, Project, Activity, DSAActivity
+from django.http import JsonResponse
+from riseapp.conditional import conditional_page
+from . import catalog, leaderboards
+from .models import Blog, Project, Activity, DSAActivity, Leaderboard
 
 # Create your views here.
 
+BLOGS_PER_PAGE = 12
+PROJECTS_PER_PAGE = 12
 
+BLOG_CARD_FIELDS = (
+    "title", "slug", "excerpt", "thumbnail", "thumbnail_variants",
+    "published_at", "created_at",
+    "author__first_name",
+    "author__profile__profile_pic", "author__profile__profile_pic_variants",
+)
+
+
+@conditional_page("community.Blog", "accounts.User", "accounts.Profile", cache_anonymous=True)
 def blogs_list(request):
-    """Display all published blogs"""
-    blogs = Blog.objects.filter(status="published").order_by(
-        "-published_at", "-created_at"
+    """Display published blogs, a page at a time"""
+    blogs = (
+        Blog.objects.filter(status="published")
+        .select_related("author__profile")
+        # Only what a card shows; the HTML content stays in the database
+        .only(*BLOG_CARD_FIELDS)
+        .order_by("-published_at", "-created_at")
     )
+    page = Paginator(blogs, BLOGS_PER_PAGE).get_page(request.GET.get("page"))
 
-    context = {"blogs": blogs, "TITLE": "Articles & Blogs"}
+    context = {"blogs": page, "page_obj": page, "TITLE": "Articles & Blogs"}
     return render(request, "Pages/blogs.html", context)
 
 
+def _blog_updated(request, slug):
+    updated_at = (
+        Blog.objects.filter(slug=slug, status="published")
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    return (slug, updated_at) if updated_at else None
+
+
+@conditional_page(detail=_blog_updated, cache_anonymous=True)
 def blog_detail(request, slug):
     """Display individual blog detail"""
     blog = get_object_or_404(Blog, slug=slug, status="published")
@@ -23,14 +52,50 @@ def blog_detail(request, slug):
     return render(request, "Pages/blog-detail.html", context)
 
 
+@conditional_page(
+    "community.Project", "community.ProjectCategory", "community.Skill",
+    "accounts.User", "accounts.Profile", cache_anonymous=True,
+)
 def projects_list(request):
-    """Display all projects"""
-    projects = Project.objects.all().order_by("-created_at")
+    """Display projects a page at a time, filtered by category, type and skills"""
+    filters = catalog.parse_filters(request.GET)
+    projects = (
+        catalog.filter_projects(Project.objects.all(), filters)
+        .select_related("category", "leader__profile")
+        .prefetch_related("skills")
+        .defer("details")
+        .order_by("-created_at", "-pk")
+    )
+    page = Paginator(projects, PROJECTS_PER_PAGE).get_page(request.GET.get("page"))
 
-    context = {"projects": projects, "TITLE": "Projects"}
+    context = {
+        "projects": page,
+        "page_obj": page,
+        "facets": catalog.facets(filters),
+        "filtered": any(filters.values()),
+        "query_string": catalog.query_string(filters),
+        "TITLE": "Projects",
+    }
     return render(request, "Pages/projects.html", context)
 
 
+@conditional_page(
+    "community.Project", "community.ProjectCategory", "community.ProjectImage",
+    "community.Skill", "accounts.User", "accounts.Profile", cache_anonymous=True,
+)
+def project_detail(request, pk):
+    """Display one project with its details, team and screenshots"""
+    project = get_object_or_404(
+        Project.objects.select_related("category", "leader")
+        .prefetch_related("skills", "images", "members"),
+        pk=pk,
+    )
+
+    context = {"project": project, "TITLE": project.title}
+    return render(request, "Pages/project-detail.html", context)
+
+
+@conditional_page("community.Activity", "community.ActivityImage", cache_anonymous=True)
 def activities_list(request):
     """Display all activities"""
     activities = Activity.objects.all().order_by("-date", "-created_at")
@@ -39,7 +104,67 @@ def activities_list(request):
     return render(request, "Pages/activities.html", context)
 
 
+@conditional_page(cache_anonymous=True)
 def resources_list(request):
     """Display resources page"""
     context = {"TITLE": "Resources"}
     return render(request, "Pages/resources.html", context)
+
+
+def _leaderboard_period(request):
+    period = request.GET.get("period", "all_time")
+    return period if period in leaderboards.PERIODS else "all_time"
+
+
+def leaderboard(request):
+    """Display the community leaderboard for one period"""
+    period = _leaderboard_period(request)
+
+    nearby = []
+    user_rank = 0
+    if request.user.is_authenticated:
+        user_rank = leaderboards.rank_of(request.user, period)
+        if user_rank:
+            nearby = leaderboards.around(request.user, period, 5)
+
+    context = {
+        "entries": leaderboards.top(period, 50),
+        "nearby": nearby,
+        "user_rank": user_rank,
+        "period": period,
+        "periods": Leaderboard.PERIOD_CHOICES,
+        "TITLE": "Leaderboard",
+    }
+    return render(request, "Pages/leaderboard.html", context)
+
+
+def _entry_json(entry):
+    return {
+        "rank": entry.rank,
+        "username": entry.user.username,
+        "points": entry.points,
+    }
+
+
+def leaderboard_api(request):
+    """
+    JSON standings: ?period=&limit= for the top entries, plus the
+    requesting user's rank and neighbours when signed in.
+    """
+    period = _leaderboard_period(request)
+    try:
+        limit = min(max(int(request.GET.get("limit", 10)), 1), 100)
+    except ValueError:
+        limit = 10
+
+    data = {
+        "success": True,
+        "period": period,
+        "top": [_entry_json(entry) for entry in leaderboards.top(period, limit)],
+    }
+    if request.user.is_authenticated:
+        data["rank"] = leaderboards.rank_of(request.user, period)
+        data["around"] = [
+            _entry_json(entry) for entry in leaderboards.around(request.user, period, 5)
+        ]
+    return JsonResponse(data)
@@ -10,6 +10,7 @@ urlpatterns = [
     path("accounts/", include("accounts.urls", namespace="accounts")),
     path("community/", include("community.urls", namespace="community")),
     path("feed/", include("feed.urls", namespace="feed")),
+    path("search/", include("search.urls", namespace="search")),
 ]
 
 if settings.DEBUG:
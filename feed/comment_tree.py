@@ -0,0 +1,111 @@
+import re
+
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
+
+from .models import PostComment
+from .pagination import InvalidCursor
+from .viewer_state import ViewerState
+
+# Top-level comments rendered with the post / per "load more" request
+COMMENTS_PAGE_SIZE = 20
+
+# Replies returned per "view replies" request
+REPLIES_PAGE_SIZE = 10
+
+PATH_RE = re.compile(r"(?:\d{%d}/)+" % PostComment.PATH_STEP)
+
+
+def _decode_comment_cursor(cursor):
+    try:
+        return int(cursor)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def _subtree(path):
+    """
+    Lookups matching every descendant of the comment at `path`.
+
+    Descendant paths extend it, so they sort after it and before the path
+    with its final "/" replaced by "0", the next character: a range the
+    (post, path) index answers directly, unlike a LIKE prefix match.
+    """
+    return Q(path__gt=path, path__lt=path[:-1] + "0")
+
+
+def _paged(queryset, page_size, cursor_of):
+    # Fetch one extra row to find out whether another page exists
+    comments = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = cursor_of(comments[-1])
+    return comments, next_cursor
+
+
+def _add_thread_sizes(post, comments):
+    """Set `reply_count`, the size of each top-level comment's thread"""
+    roots = [comment for comment in comments if comment.path]
+    sizes = {}
+    if roots:
+        threads = Q()
+        for root in roots:
+            threads |= _subtree(root.path)
+        sizes = dict(
+            post.post_comments.filter(threads)
+            .annotate(root=Substr("path", 1, PostComment.PATH_STEP + 1))
+            .values("root")
+            .annotate(count=Count("pk"))
+            .order_by()
+            .values_list("root", "count")
+        )
+    for comment in comments:
+        comment.reply_count = sizes.get(comment.path, 0)
+
+
+def comment_page(post, user, cursor=None, page_size=COMMENTS_PAGE_SIZE):
+    """
+    One page of a post's top-level comments, oldest first; returns
+    (comments, next_cursor).
+
+    Each comment comes back with its author, profile, the viewer's
+    like-state and `reply_count` (every reply in its thread, at any depth),
+    in three queries per page. The cursor is the last id returned.
+    """
+    queryset = (
+        post.post_comments.filter(parent__isnull=True)
+        .select_related("author", "author__profile")
+        .order_by("id")
+    )
+    if cursor:
+        queryset = queryset.filter(id__gt=_decode_comment_cursor(cursor))
+
+    comments, next_cursor = _paged(queryset, page_size, lambda comment: str(comment.pk))
+    _add_thread_sizes(post, comments)
+    ViewerState.for_objects(user, comments=comments)
+    return comments, next_cursor
+
+
+def reply_page(comment, user, cursor=None, page_size=REPLIES_PAGE_SIZE):
+    """
+    One page of the replies under a comment, at every depth, in thread
+    (materialized path) order; returns (replies, next_cursor).
+
+    Replies come back with authors, profiles and the viewer's like-state in
+    two queries per page, however deep the thread; `reply.depth` gives the
+    indentation. The cursor is the last path returned.
+    """
+    queryset = (
+        PostComment.objects.filter(_subtree(comment.path), post_id=comment.post_id)
+        .select_related("author", "author__profile")
+        .order_by("path")
+    )
+    if cursor:
+        if not PATH_RE.fullmatch(cursor) or not cursor.startswith(comment.path):
+            raise InvalidCursor(f"Not a reply path under comment {comment.pk}")
+        queryset = queryset.filter(path__gt=cursor)
+
+    replies, next_cursor = _paged(queryset, page_size, lambda reply: reply.path)
+    ViewerState.for_objects(user, comments=replies)
+    return replies, next_cursor
@@ -0,0 +1,79 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import FeedPost, PostComment, PostLikeNew, SavedPostNew, CommentLikeNew
+
+
+def bump(model, pk, field, delta):
+    """
+    Atomically add `delta` to a counter column with a single UPDATE.
+
+    The arithmetic happens in the database (F expression), so concurrent
+    likes never overwrite each other. Decrements are clamped at zero to keep
+    PositiveIntegerField constraints satisfied if the counter has drifted.
+    """
+    if delta >= 0:
+        expression = F(field) + delta
+    else:
+        expression = Greatest(F(field) + delta, Value(0))
+    model.objects.filter(pk=pk).update(**{field: expression})
+
+
+def _count_subquery(model, fk):
+    """Correlated COUNT(*) of `model` rows pointing at the outer row"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef("pk")})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+# Rows rewritten per UPDATE while reconciling
+RECONCILE_BATCH_SIZE = 500
+
+
+# counter field -> (source model, foreign key) for every denormalized column
+COUNTER_SOURCES = {
+    FeedPost: {
+        "like_count": (PostLikeNew, "post"),
+        "comment_count": (PostComment, "post"),
+        "save_count": (SavedPostNew, "post"),
+    },
+    PostComment: {
+        "like_count": (CommentLikeNew, "comment"),
+    },
+}
+
+
+def reconcile(model):
+    """
+    Recompute every counter column on `model` from its source table.
+
+    Only rows whose stored value differs from the real count are rewritten.
+    Returns the number of rows that were repaired.
+    """
+    sources = COUNTER_SOURCES[model]
+    actual = {
+        f"actual_{field}": _count_subquery(source, fk)
+        for field, (source, fk) in sources.items()
+    }
+
+    # Materialize the ids first: rewriting rows while a cursor is still open
+    # over the same table is unsafe on SQLite.
+    drifted_ids = list(
+        model.objects.annotate(**actual)
+        .exclude(**{field: F(f"actual_{field}") for field in sources})
+        .values_list("pk", flat=True)
+    )
+    fixes = {field: _count_subquery(source, fk) for field, (source, fk) in sources.items()}
+
+    for start in range(0, len(drifted_ids), RECONCILE_BATCH_SIZE):
+        batch = drifted_ids[start : start + RECONCILE_BATCH_SIZE]
+        model.objects.filter(pk__in=batch).update(**fixes)
+
+    return len(drifted_ids)
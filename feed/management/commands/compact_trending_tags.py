@@ -0,0 +1,15 @@
+# feed/management/commands/compact_trending_tags.py
+
+from django.core.management.base import BaseCommand
+from feed.trending import compact
+
+
+class Command(BaseCommand):
+    help = "Rebase the decayed trending-hashtag counters and drop faded tags"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Compacting trending hashtag counters...")
+        dropped = compact()
+        self.stdout.write(
+            self.style.SUCCESS(f"\nCompleted! Dropped {dropped} faded counter(s).")
+        )
@@ -0,0 +1,23 @@
+# feed/management/commands/extract_post_tags.py
+
+from django.core.management.base import BaseCommand
+from feed.models import FeedPost, Post
+from feed.tagging import tag_feed_post, tag_post
+
+
+class Command(BaseCommand):
+    help = "Re-link hashtags and mentions for existing posts"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Extracting hashtags and mentions...")
+
+        total = 0
+        for model, tag in ((Post, tag_post), (FeedPost, tag_feed_post)):
+            count = 0
+            for post in model.objects.order_by("pk").iterator(chunk_size=500):
+                tag(post)
+                count += 1
+            total += count
+            self.stdout.write(f"  {model._meta.verbose_name_plural}: {count} post(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted! Tagged {total} posts."))
@@ -0,0 +1,21 @@
+# feed/management/commands/reconcile_feed_counters.py
+
+from django.core.management.base import BaseCommand
+from feed.counters import COUNTER_SOURCES, reconcile
+
+
+class Command(BaseCommand):
+    help = "Repair drift in the denormalized like/comment/save counters"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconciling feed engagement counters...")
+
+        total = 0
+        for model in COUNTER_SOURCES:
+            repaired = reconcile(model)
+            total += repaired
+            self.stdout.write(
+                f"  {model._meta.verbose_name_plural}: {repaired} row(s) repaired"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted! Repaired {total} rows."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0003_feedpost_postcomment_commentlikenew_postlikenew_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedpost',
+            index=models.Index(fields=['is_active', '-is_pinned', '-created_at', 'id'], name='feed_feedpo_is_acti_f7e464_idx'),
+        ),
+    ]
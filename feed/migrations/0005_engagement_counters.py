@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef("pk")})
+            .order_by()
+            .values(fk)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    FeedPost = apps.get_model("feed", "FeedPost")
+    PostComment = apps.get_model("feed", "PostComment")
+    PostLikeNew = apps.get_model("feed", "PostLikeNew")
+    SavedPostNew = apps.get_model("feed", "SavedPostNew")
+    CommentLikeNew = apps.get_model("feed", "CommentLikeNew")
+
+    FeedPost.objects.update(
+        like_count=_count(PostLikeNew, "post"),
+        comment_count=_count(PostComment, "post"),
+        save_count=_count(SavedPostNew, "post"),
+    )
+    PostComment.objects.update(like_count=_count(CommentLikeNew, "comment"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_feedpost_feed_order_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedpost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedpost',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedpost',
+            name='save_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
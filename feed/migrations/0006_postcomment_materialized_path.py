@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+PATH_STEP = 10
+
+
+def backfill_paths(apps, schema_editor):
+    PostComment = apps.get_model("feed", "PostComment")
+
+    # Walk the forest one level at a time so every parent has its path first
+    level = list(PostComment.objects.filter(parent__isnull=True))
+    parent_paths = {}
+    depth = 0
+    while level:
+        for comment in level:
+            prefix = parent_paths.get(comment.parent_id, "")
+            comment.path = f"{prefix}{comment.pk:0{PATH_STEP}d}/"
+            comment.depth = depth
+        PostComment.objects.bulk_update(level, ["path", "depth"], batch_size=500)
+
+        parent_paths = {comment.pk: comment.path for comment in level}
+        level = list(PostComment.objects.filter(parent_id__in=list(parent_paths)))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0005_engagement_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', 'path'], name='feed_postco_post_id_279c68_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0006_postcomment_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', 'parent', 'id'], name='feed_postco_post_id_833df6_idx'),
+        ),
+    ]
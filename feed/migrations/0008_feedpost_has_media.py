@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:16
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def backfill_has_media(apps, schema_editor):
+    FeedPost = apps.get_model("feed", "FeedPost")
+    PostMedia = apps.get_model("feed", "PostMedia")
+
+    FeedPost.objects.filter(
+        Exists(PostMedia.objects.filter(post=OuterRef("pk")))
+    ).update(has_media=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0007_postcomment_sibling_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedpost',
+            name='has_media',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_has_media, migrations.RunPython.noop),
+    ]
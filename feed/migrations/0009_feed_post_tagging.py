@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0008_feedpost_has_media'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hashtag',
+            name='feed_posts',
+            field=models.ManyToManyField(blank=True, related_name='hashtags', to='feed.feedpost'),
+        ),
+        migrations.CreateModel(
+            name='MentionNew',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='feed.feedpost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mention',
+                'verbose_name_plural': 'Mentions',
+                'unique_together': {('post', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0009_feed_post_tagging'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=10, unique=True)),
+                ('epoch', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HashTagTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('day', 'Today'), ('week', 'This week')], max_length=10)),
+                ('score', models.FloatField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trends', to='feed.hashtag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', '-score'], name='feed_hashta_window_50aa1a_idx')],
+                'unique_together': {('hashtag', 'window')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0010_hashtag_trends'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedpost',
+            name='blog_thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='postmedia',
+            name='file_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 22:41
+
+import riseapp.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedpost',
+            name='blog_thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='feed/blog_thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='posts/images/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=riseapp.storage.ContentAddressedStorage(), upload_to='posts/videos/'),
+        ),
+        migrations.AlterField(
+            model_name='postmedia',
+            name='file',
+            field=models.FileField(storage=riseapp.storage.ContentAddressedStorage(), upload_to='feed/media/'),
+        ),
+    ]
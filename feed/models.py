@@ -2,6 +2,27 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from tinymce.models import HTMLField
+from riseapp.storage import blob_storage
+
+
+def save_without_counters(instance, counters, kwargs):
+    """
+    Leave `counters` out of a full save of an existing row.
+
+    Those columns only change in the database, through F() expressions (see
+    feed.counters and feed.view_counter), so a loaded instance may hold a
+    stale copy; writing it back would undo every change made since.
+    """
+    if instance._state.adding or kwargs.get("force_insert"):
+        return kwargs
+    if kwargs.get("update_fields") is not None:
+        return kwargs
+    kwargs["update_fields"] = [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in counters
+    ]
+    return kwargs
 
 
 class Post(models.Model):
@@ -23,8 +44,8 @@ class Post(models.Model):
     content = models.TextField(help_text="Post content/caption")
 
     # Media fields
-    image = models.ImageField(upload_to="posts/images/", blank=True, null=True)
-    video = models.FileField(upload_to="posts/videos/", blank=True, null=True)
+    image = models.ImageField(upload_to="posts/images/", storage=blob_storage, blank=True, null=True)
+    video = models.FileField(upload_to="posts/videos/", storage=blob_storage, blank=True, null=True)
 
     # Blog reference (if sharing a blog post)
     blog = models.ForeignKey(
@@ -53,9 +74,15 @@ class Post(models.Model):
             models.Index(fields=["author", "-created_at"]),
         ]
 
+    # Written only by feed.view_counter (see save_without_counters)
+    COUNTERS = ("views_count",)
+
     def __str__(self):
         return f"{self.author.username} - {self.post_type} - {self.created_at.strftime('%Y-%m-%d')}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **save_without_counters(self, self.COUNTERS, kwargs))
+
     @property
     def likes_count(self):
         return self.likes.count()
@@ -191,6 +218,7 @@ class HashTag(models.Model):
 
     name = models.CharField(max_length=100, unique=True)
     posts = models.ManyToManyField(Post, related_name="hashtag", blank=True)
+    feed_posts = models.ManyToManyField("FeedPost", related_name="hashtags", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -210,6 +238,41 @@ class HashTag(models.Model):
         return self.posts.count()
 
 
+class HashTagTrend(models.Model):
+    """
+    Exponentially decayed usage counter of a hashtag for one trending window.
+
+    `score` is stored relative to the window's TrendEpoch (see feed.trending),
+    so every row decays at the same rate and ORDER BY score is the ranking.
+    """
+
+    WINDOW_CHOICES = [
+        ("day", "Today"),
+        ("week", "This week"),
+    ]
+
+    hashtag = models.ForeignKey(HashTag, on_delete=models.CASCADE, related_name="trends")
+    window = models.CharField(max_length=10, choices=WINDOW_CHOICES)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("hashtag", "window")
+        indexes = [models.Index(fields=["window", "-score"])]
+
+    def __str__(self):
+        return f"#{self.hashtag.name} ({self.window}): {self.score:.2f}"
+
+
+class TrendEpoch(models.Model):
+    """Reference time the HashTagTrend scores of a window are relative to"""
+
+    window = models.CharField(max_length=10, unique=True)
+    epoch = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.window} since {self.epoch:%Y-%m-%d %H:%M}"
+
+
 class Mention(models.Model):
     """
     User mentions in posts
@@ -255,10 +318,20 @@ class FeedPost(models.Model):
     is_pinned = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     views_count = models.PositiveIntegerField(default=0)
+
+    # Denormalized engagement counters, kept in sync by feed.signals
+    # (repair drift with `manage.py reconcile_feed_counters`)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    save_count = models.PositiveIntegerField(default=0)
+
+    # Whether any PostMedia is attached, kept in sync by accounts.signals
+    has_media = models.BooleanField(default=False)
     
     # Blog fields
     blog_title = models.CharField(max_length=255, blank=True, null=True)
-    blog_thumbnail = models.ImageField(upload_to="feed/blog_thumbnails/", blank=True, null=True)
+    blog_thumbnail = models.ImageField(upload_to="feed/blog_thumbnails/", storage=blob_storage, blank=True, null=True)
+    blog_thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     blog_content = HTMLField(blank=True, null=True)
     
     # Project fields
@@ -276,18 +349,26 @@ class FeedPost(models.Model):
             models.Index(fields=["-created_at"]),
             models.Index(fields=["author", "-created_at"]),
             models.Index(fields=["post_type"]),
+            # Covers the keyset-paginated feed (see feed.pagination)
+            models.Index(fields=["is_active", "-is_pinned", "-created_at", "id"]),
         ]
 
+    # Written only by feed.counters and feed.view_counter (see save_without_counters)
+    COUNTERS = ("views_count", "like_count", "comment_count", "save_count")
+
     def __str__(self):
         return f"{self.author.username} - {self.post_type} - {self.created_at.strftime('%Y-%m-%d')}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **save_without_counters(self, self.COUNTERS, kwargs))
+
     @property
     def likes_count(self):
-        return self.post_likes.count()
+        return self.like_count
 
     @property
     def comments_count(self):
-        return self.post_comments.count()
+        return self.comment_count
 
     @property
     def title(self):
@@ -319,7 +400,9 @@ class PostMedia(models.Model):
 
     post = models.ForeignKey(FeedPost, on_delete=models.CASCADE, related_name="media_files")
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPES)
-    file = models.FileField(upload_to="feed/media/")
+    file = models.FileField(upload_to="feed/media/", storage=blob_storage)
+    # Resized renditions of images (see riseapp.images)
+    file_variants = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     order = models.PositiveIntegerField(default=0)  # For ordering media
 
@@ -372,17 +455,56 @@ class PostComment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_edited = models.BooleanField(default=False)
 
+    # Materialized path: zero-padded ids of every ancestor plus this comment,
+    # e.g. "0000000012/0000000045/". A comment's replies at every depth are
+    # the paths that extend its own, and ordering by path returns them in
+    # display order (see feed.comment_tree.reply_page).
+    path = models.CharField(max_length=255, blank=True, default="")
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    # Denormalized counter, kept in sync by feed.signals
+    like_count = models.PositiveIntegerField(default=0)
+
+    COUNTERS = ("like_count",)  # see save_without_counters
+    PATH_STEP = 10  # digits per path segment
+    MAX_DEPTH = 20  # comments this deep take no replies (keeps path in max_length)
+
     class Meta:
         ordering = ["created_at"]
         verbose_name = "Post Comment"
         verbose_name_plural = "Post Comments"
+        indexes = [
+            models.Index(fields=["post", "path"]),
+            # Keyset pages of sibling comments (see feed.comment_tree)
+            models.Index(fields=["post", "parent", "id"]),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on post {self.post.id}"
 
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+
+        if creating and self.parent_id:
+            if not self.parent.can_reply:
+                raise ValueError(f"Replies are limited to {self.MAX_DEPTH} levels")
+            self.depth = self.parent.depth + 1
+
+        super().save(*args, **save_without_counters(self, self.COUNTERS, kwargs))
+
+        # The path ends with our own id, which only exists after the insert
+        if creating and not self.path:
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = f"{prefix}{self.pk:0{self.PATH_STEP}d}/"
+            PostComment.objects.filter(pk=self.pk).update(path=self.path)
+
     @property
     def likes_count(self):
-        return self.comment_likes_new.count()
+        return self.like_count
+
+    @property
+    def can_reply(self):
+        return self.depth < self.MAX_DEPTH
 
 
 class PostLikeNew(models.Model):
@@ -451,3 +573,24 @@ class SavedPostNew(models.Model):
 
     def __str__(self):
         return f"{self.user.username} saved post {self.post.id}"
+
+
+class MentionNew(models.Model):
+    """
+    User mentions in posts
+    """
+    post = models.ForeignKey(FeedPost, on_delete=models.CASCADE, related_name="mentions")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_mentions"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("post", "user")
+        verbose_name = "Mention"
+        verbose_name_plural = "Mentions"
+
+    def __str__(self):
+        return f"@{self.user.username} in post {self.post.id}"
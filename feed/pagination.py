@@ -0,0 +1,69 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Number of posts rendered per feed page / infinite-scroll slice
+FEED_PAGE_SIZE = 10
+
+# Total order used by the feed. The trailing "id" makes every position unique,
+# so a cursor always points between two rows, never into a tie.
+FEED_ORDERING = ("-is_pinned", "-created_at", "id")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a feed cursor cannot be decoded"""
+
+
+def encode_cursor(post):
+    """Encode the sort key of the last post on a page into an opaque token"""
+    payload = {
+        "p": int(post.is_pinned),
+        "c": post.created_at.isoformat(),
+        "i": post.pk,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor into (is_pinned, created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(payload["c"])
+        if created_at is None:
+            raise ValueError("bad timestamp")
+        return bool(payload["p"]), created_at, int(payload["i"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def paginate_feed(queryset, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    Keyset-paginate a FeedPost queryset on FEED_ORDERING.
+
+    Instead of OFFSET, each page seeks directly past the row named by the
+    cursor, so fetching page 1 or page 10,000 costs the same index range scan.
+
+    Returns (posts, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(*FEED_ORDERING)
+
+    if cursor:
+        is_pinned, created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(is_pinned__lt=is_pinned)
+            | Q(is_pinned=is_pinned, created_at__lt=created_at)
+            | Q(is_pinned=is_pinned, created_at=created_at, id__gt=pk)
+        )
+
+    # Fetch one extra row to find out whether another page exists
+    posts = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        next_cursor = encode_cursor(posts[-1])
+
+    return posts, next_cursor
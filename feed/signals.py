@@ -0,0 +1,67 @@
+# feed/signals.py
+
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .counters import bump
+from .models import FeedPost, PostComment, PostLikeNew, SavedPostNew, CommentLikeNew
+from .view_counter import view_counter
+
+
+@receiver(post_save, sender=PostLikeNew)
+def increment_like_count(sender, instance, created, **kwargs):
+    """Count a new like on the post"""
+    if created:
+        bump(FeedPost, instance.post_id, "like_count", 1)
+
+
+@receiver(post_delete, sender=PostLikeNew)
+def decrement_like_count(sender, instance, **kwargs):
+    """Remove a like from the post's count"""
+    bump(FeedPost, instance.post_id, "like_count", -1)
+
+
+@receiver(post_save, sender=PostComment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Count a new comment (or reply) on the post"""
+    if created:
+        bump(FeedPost, instance.post_id, "comment_count", 1)
+
+
+@receiver(post_delete, sender=PostComment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Remove a comment from the post's count"""
+    bump(FeedPost, instance.post_id, "comment_count", -1)
+
+
+@receiver(post_save, sender=SavedPostNew)
+def increment_save_count(sender, instance, created, **kwargs):
+    """Count a new bookmark on the post"""
+    if created:
+        bump(FeedPost, instance.post_id, "save_count", 1)
+
+
+@receiver(post_delete, sender=SavedPostNew)
+def decrement_save_count(sender, instance, **kwargs):
+    """Remove a bookmark from the post's count"""
+    bump(FeedPost, instance.post_id, "save_count", -1)
+
+
+@receiver(post_save, sender=CommentLikeNew)
+def increment_comment_like_count(sender, instance, created, **kwargs):
+    """Count a new like on the comment"""
+    if created:
+        bump(PostComment, instance.comment_id, "like_count", 1)
+
+
+@receiver(post_delete, sender=CommentLikeNew)
+def decrement_comment_like_count(sender, instance, **kwargs):
+    """Remove a like from the comment's count"""
+    bump(PostComment, instance.comment_id, "like_count", -1)
+
+
+@receiver(request_finished)
+def flush_view_counts(sender, **kwargs):
+    """Write buffered post views once a flush is due, after the response"""
+    view_counter.flush_if_due()
@@ -0,0 +1,121 @@
+import html
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.html import strip_tags
+
+from . import trending
+from .models import HashTag, Mention, MentionNew
+
+# "#tag" / "@user" not glued to a preceding word, so "a@b.com" and
+# "issue#12" are not picked up
+HASHTAG_RE = re.compile(r"(?<![\w&#])#(\w+)")
+MENTION_RE = re.compile(r"(?<![\w@.])@(\w+)")
+
+TAG_MAX_LENGTH = HashTag._meta.get_field("name").max_length
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def extract(*texts, is_html=False):
+    """
+    Parse hashtags and mentioned usernames out of some text.
+
+    Returns (tag_names, usernames) with duplicates removed in order of first
+    appearance; tag names are lowercased. HTML (blog and project bodies) is
+    reduced to its text first so markup and entities don't produce tags.
+    """
+    text = "\n".join(t for t in texts if t)
+    if is_html:
+        text = html.unescape(strip_tags(text))
+
+    tags = _unique(tag.lower()[:TAG_MAX_LENGTH] for tag in HASHTAG_RE.findall(text))
+    usernames = _unique(MENTION_RE.findall(text))
+    return tags, usernames
+
+
+def resolve_hashtags(names):
+    """HashTag ids for the given names, creating the missing ones in bulk"""
+    if not names:
+        return []
+
+    ids = dict(HashTag.objects.filter(name__in=names).values_list("name", "pk"))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        # Concurrent posts may create the same tag; let the unique index decide
+        HashTag.objects.bulk_create(
+            [HashTag(name=name) for name in missing], ignore_conflicts=True
+        )
+        ids.update(HashTag.objects.filter(name__in=missing).values_list("name", "pk"))
+    return [ids[name] for name in names if name in ids]
+
+
+def resolve_mentions(usernames):
+    """Ids of the users that exist among the given usernames"""
+    if not usernames:
+        return []
+    return list(
+        get_user_model().objects.filter(username__in=usernames).values_list("pk", flat=True)
+    )
+
+
+def _sync_links(model, owner_field, owner_id, target_field, target_ids, created):
+    """
+    Make `model` rows for owner_id link exactly target_ids.
+
+    New owners only need one bulk INSERT; edited ones also drop the links
+    that no longer appear in the text.
+    """
+    links = model.objects.filter(**{owner_field: owner_id})
+    target_ids = set(target_ids)
+
+    if not created:
+        existing = set(links.values_list(target_field, flat=True))
+        stale = existing - target_ids
+        if stale:
+            links.filter(**{f"{target_field}__in": stale}).delete()
+        target_ids -= existing
+
+    model.objects.bulk_create(
+        [model(**{owner_field: owner_id, target_field: pk}) for pk in sorted(target_ids)],
+        ignore_conflicts=True,
+    )
+
+
+def tag_post(post, created=False):
+    """Link a legacy Post to the hashtags and users mentioned in it"""
+    tags, usernames = extract(post.content)
+    with transaction.atomic():
+        hashtag_ids = resolve_hashtags(tags)
+        _sync_links(
+            HashTag.posts.through, "post_id", post.pk,
+            "hashtag_id", hashtag_ids, created,
+        )
+        _sync_links(
+            Mention, "post_id", post.pk,
+            "user_id", resolve_mentions(usernames), created,
+        )
+        if created:
+            trending.record(hashtag_ids)
+
+
+def tag_feed_post(post, created=False):
+    """Link a FeedPost (any type) to the hashtags and users mentioned in it"""
+    tags, usernames = extract(
+        post.title, post.content, is_html=post.post_type in ("blog", "project")
+    )
+    with transaction.atomic():
+        hashtag_ids = resolve_hashtags(tags)
+        _sync_links(
+            HashTag.feed_posts.through, "feedpost_id", post.pk,
+            "hashtag_id", hashtag_ids, created,
+        )
+        _sync_links(
+            MentionNew, "post_id", post.pk,
+            "user_id", resolve_mentions(usernames), created,
+        )
+        if created:
+            trending.record(hashtag_ids)
@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from django.conf import settings
+
+from riseapp.jobs import task
+
+from .trending import compact
+
+
+@task(every=timedelta(seconds=getattr(settings, "TRENDING_COMPACT_INTERVAL", 3600)))
+def compact_trending_tags():
+    """Rebase the decayed trending-hashtag counters and drop faded tags"""
+    compact()
@@ -1,3 +1,581 @@
-from django.test import TestCase
+import math
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import trending
+from .comment_tree import comment_page, reply_page
+from .models import (
+    CommentLikeNew,
+    FeedPost,
+    HashTag,
+    HashTagTrend,
+    PostComment,
+    PostLikeNew,
+    PostMedia,
+    SavedPostNew,
+    TrendEpoch,
+)
+from .pagination import InvalidCursor, paginate_feed
+from .tagging import extract, tag_feed_post
+from .uploads import sniff
+from .view_counter import ViewCounter, view_counter
+from .viewer_state import ViewerState
+
+User = get_user_model()
+
+
+class EngagementCounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.fan = User.objects.create_user(username="fan", email="fan@example.com", password="pass")
+        self.post = FeedPost.objects.create(author=self.author, post_type="normal", normal_content="Hello")
+
+    def counters(self):
+        self.post.refresh_from_db()
+        return self.post.like_count, self.post.comment_count, self.post.save_count
+
+    def test_signals_keep_counters_in_step(self):
+        like = PostLikeNew.objects.create(post=self.post, user=self.fan)
+        saved = SavedPostNew.objects.create(post=self.post, user=self.fan)
+        comment = PostComment.objects.create(post=self.post, author=self.fan, content="Nice")
+        PostComment.objects.create(post=self.post, author=self.author, content="Thanks", parent=comment)
+        comment_like = CommentLikeNew.objects.create(comment=comment, user=self.author)
+        self.assertEqual(self.counters(), (1, 2, 1))
+        comment.refresh_from_db()
+        self.assertEqual(comment.like_count, 1)
+
+        like.delete()
+        saved.delete()
+        comment_like.delete()
+        comment.delete()  # takes its reply with it
+        self.assertEqual(self.counters(), (0, 0, 0))
+
+    def test_full_save_keeps_counters_changed_since_load(self):
+        stale_post = FeedPost.objects.get(pk=self.post.pk)
+        comment = PostComment.objects.create(post=self.post, author=self.fan, content="Nice")
+        stale_comment = PostComment.objects.get(pk=comment.pk)
+        PostLikeNew.objects.create(post=self.post, user=self.fan)
+        CommentLikeNew.objects.create(comment=comment, user=self.author)
+
+        stale_post.normal_content = "Edited"
+        stale_post.save()
+        stale_comment.content = "Edited"
+        stale_comment.save()
+
+        self.assertEqual(self.counters()[:2], (1, 1))
+        self.assertEqual(self.post.normal_content, "Edited")
+        comment.refresh_from_db()
+        self.assertEqual((comment.content, comment.like_count), ("Edited", 1))
+
+    def test_counters_can_still_be_saved_explicitly(self):
+        self.post.like_count = 7
+        self.post.save(update_fields=["like_count"])
+        self.assertEqual(self.counters()[0], 7)
+
+    def test_reconcile_repairs_drift(self):
+        PostLikeNew.objects.create(post=self.post, user=self.fan)
+        comment = PostComment.objects.create(post=self.post, author=self.fan, content="Nice")
+        CommentLikeNew.objects.create(comment=comment, user=self.author)
+        FeedPost.objects.filter(pk=self.post.pk).update(like_count=5, save_count=3)
+        PostComment.objects.filter(pk=comment.pk).update(like_count=0)
+        untouched = FeedPost.objects.create(author=self.author, post_type="normal", normal_content="Quiet")
+
+        out = StringIO()
+        call_command("reconcile_feed_counters", stdout=out)
+
+        self.assertIn("Repaired 2 rows", out.getvalue())
+        self.assertEqual(self.counters(), (1, 1, 0))
+        comment.refresh_from_db()
+        self.assertEqual(comment.like_count, 1)
+        untouched.refresh_from_db()
+        self.assertEqual((untouched.like_count, untouched.comment_count), (0, 0))
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.post = FeedPost.objects.create(author=self.user, post_type="normal", normal_content="Hello")
+        self.other = FeedPost.objects.create(author=self.user, post_type="normal", normal_content="World")
+        self.addCleanup(view_counter.flush)
+
+    def test_record_buffers_until_flush(self):
+        counter = ViewCounter(interval=3600, threshold=100)
+        counter.record(FeedPost, self.post.pk)
+        counter.record(FeedPost, self.post.pk)
+        counter.record(FeedPost, self.other.pk)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 0)
+        self.assertEqual(counter.pending(FeedPost, self.post.pk), 2)
+
+        self.assertEqual(counter.flush(), 3)
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.post.views_count, self.other.views_count), (2, 1))
+        self.assertEqual(counter.pending(FeedPost, self.post.pk), 0)
+
+    def test_flush_if_due(self):
+        counter = ViewCounter(interval=3600, threshold=3)
+        counter.record(FeedPost, self.post.pk, views=2)
+        self.assertEqual(counter.flush_if_due(), 0)
+
+        counter.record(FeedPost, self.post.pk)
+        self.assertEqual(counter.flush_if_due(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 3)
+
+    def test_due_views_are_written_after_the_response(self):
+        self.client.force_login(self.user)
+        view_counter.flush()
+        threshold = view_counter.threshold
+        view_counter.threshold = 1
+        self.addCleanup(setattr, view_counter, "threshold", threshold)
+
+        response = self.client.get(reverse("feed:post_detail", args=[self.post.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 1)
+        self.assertEqual(view_counter.pending(FeedPost, self.post.pk), 0)
+
+
+class FeedPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        now = timezone.now()
+        posts = [
+            FeedPost.objects.create(author=self.user, post_type="normal", normal_content=f"Post {i}")
+            for i in range(7)
+        ]
+        # Posts sharing a timestamp are ordered by id, pinned posts come first
+        FeedPost.objects.filter(pk__in=[post.pk for post in posts[:4]]).update(created_at=now)
+        FeedPost.objects.filter(pk__in=[post.pk for post in posts[4:]]).update(created_at=now - timedelta(hours=1))
+        FeedPost.objects.filter(pk=posts[6].pk).update(is_pinned=True)
+        self.expected = [posts[6].pk] + [post.pk for post in posts[:6]]
+
+    def walk(self, page_size):
+        seen, cursor = [], None
+        while True:
+            posts, cursor = paginate_feed(FeedPost.objects.all(), cursor=cursor, page_size=page_size)
+            seen.extend(post.pk for post in posts)
+            if cursor is None:
+                return seen
+
+    def test_pages_follow_the_feed_order_without_gaps(self):
+        for page_size in (1, 2, 3, 7, 10):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), self.expected)
+
+    def test_later_pages_seek_instead_of_offsetting(self):
+        _, cursor = paginate_feed(FeedPost.objects.all(), page_size=3)
+        with CaptureQueriesContext(connection) as queries:
+            posts, _ = paginate_feed(FeedPost.objects.all(), cursor=cursor, page_size=3)
+        self.assertEqual([post.pk for post in posts], self.expected[3:6])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("OFFSET", queries[0]["sql"])
+
+    def test_page_api_costs_the_same_on_every_page(self):
+        FeedPost.objects.bulk_create(
+            FeedPost(author=self.user, post_type="normal", normal_content=f"More {i}") for i in range(20)
+        )
+        self.client.force_login(self.user)
+        url = reverse("feed:feed_page_api")
+
+        counts, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {"cursor": cursor} if cursor else {})
+            data = response.json()
+            self.assertTrue(data["success"])
+            counts.append(len(queries))
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(len(set(counts)), 1)
+
+    def test_page_api_rejects_a_broken_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("feed:feed_page_api"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+
+class ViewerStateTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="pass")
+        self.posts = [
+            FeedPost.objects.create(author=self.other, post_type="normal", normal_content=f"Post {i}")
+            for i in range(3)
+        ]
+        self.comment = PostComment.objects.create(post=self.posts[0], author=self.other, content="Hi")
+
+    def test_flags_are_set_for_the_viewer_only(self):
+        PostLikeNew.objects.create(post=self.posts[0], user=self.viewer)
+        SavedPostNew.objects.create(post=self.posts[1], user=self.viewer)
+        PostLikeNew.objects.create(post=self.posts[2], user=self.other)
+        CommentLikeNew.objects.create(comment=self.comment, user=self.viewer)
+
+        state = ViewerState.for_objects(self.viewer, posts=self.posts, comments=[self.comment])
+        self.assertEqual([post.is_liked_by_user for post in self.posts], [True, False, False])
+        self.assertEqual([post.is_saved_by_user for post in self.posts], [False, True, False])
+        self.assertTrue(self.comment.is_liked_by_user)
+        self.assertEqual(state.liked_post_ids, {self.posts[0].pk})
+
+    def test_only_the_posts_on_screen_are_looked_up(self):
+        PostLikeNew.objects.create(post=self.posts[2], user=self.viewer)
+        state = ViewerState(self.viewer, post_ids=[post.pk for post in self.posts[:2]])
+        self.assertEqual(state.liked_post_ids, set())
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        more = [
+            FeedPost.objects.create(author=self.other, post_type="normal", normal_content=f"More {i}")
+            for i in range(10)
+        ]
+        for post in more:
+            PostLikeNew.objects.create(post=post, user=self.viewer)
+
+        with CaptureQueriesContext(connection) as queries:
+            state = ViewerState.for_objects(self.viewer, posts=self.posts + more, comments=[self.comment])
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(state.liked_post_ids, {post.pk for post in more})
+
+    def test_anonymous_viewers_cost_no_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            ViewerState.for_objects(AnonymousUser(), posts=self.posts)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(any(post.is_liked_by_user for post in self.posts))
+
+
+class PostDetailRevalidationTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="pass")
+        self.post = FeedPost.objects.create(author=self.other, post_type="normal", normal_content="Hello")
+        self.url = reverse("feed:post_detail", args=[self.post.pk])
+        self.client.force_login(self.viewer)
+        self.addCleanup(view_counter.flush)
+        # The first response sets the CSRF cookie, which is part of the ETag
+        self.client.get(self.url)
+
+    def etag(self):
+        return self.client.get(self.url)["ETag"]
+
+    def assertChanged(self, etag):
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.etag()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_own_like_shows_even_when_the_count_is_unchanged(self):
+        like = PostLikeNew.objects.create(post=self.post, user=self.other)
+        etag = self.etag()
+        PostLikeNew.objects.create(post=self.post, user=self.viewer)
+        like.delete()
+        self.assertChanged(etag)
+
+    def test_own_comment_like_shows_even_when_the_count_is_unchanged(self):
+        comment = PostComment.objects.create(post=self.post, author=self.other, content="Nice")
+        like = CommentLikeNew.objects.create(comment=comment, user=self.other)
+        etag = self.etag()
+        CommentLikeNew.objects.create(comment=comment, user=self.viewer)
+        like.delete()
+        self.assertChanged(etag)
+
+
+class CommentTreeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.post = FeedPost.objects.create(author=self.user, post_type="normal", normal_content="Hello")
+
+    def comment(self, parent=None, content="Hi"):
+        return PostComment.objects.create(post=self.post, author=self.user, content=content, parent=parent)
+
+    def test_paths_follow_the_thread(self):
+        root = self.comment()
+        reply = self.comment(root)
+        nested = self.comment(reply)
+        self.assertEqual((root.depth, reply.depth, nested.depth), (0, 1, 2))
+        self.assertEqual(nested.path, f"{root.pk:010d}/{reply.pk:010d}/{nested.pk:010d}/")
+
+    def test_replies_come_depth_first_across_pages(self):
+        root = self.comment()
+        first = self.comment(root, "first")
+        later = self.comment(root, "later")
+        nested = self.comment(first, "nested")
+        other_thread = self.comment()
+        self.comment(other_thread)
+
+        replies, cursor = reply_page(root, self.user, page_size=2)
+        self.assertEqual(replies, [first, nested])
+        self.assertEqual(cursor, nested.path)
+
+        replies, cursor = reply_page(root, self.user, cursor=cursor, page_size=2)
+        self.assertEqual(replies, [later])
+        self.assertIsNone(cursor)
+
+    def test_thread_sizes_count_every_depth(self):
+        busy = self.comment()
+        nested = self.comment(self.comment(busy))
+        self.comment(nested)
+        quiet = self.comment()
+
+        comments, cursor = comment_page(self.post, self.user)
+        self.assertEqual(comments, [busy, quiet])
+        self.assertEqual([comment.reply_count for comment in comments], [3, 0])
+        self.assertIsNone(cursor)
+
+    def test_query_count_does_not_grow_with_the_thread(self):
+        root = self.comment()
+        parent = root
+        for _ in range(5):
+            parent = self.comment(parent)
+        for _ in range(5):
+            self.comment(root)
+
+        with CaptureQueriesContext(connection) as queries:
+            replies, _ = reply_page(root, self.user, page_size=100)
+            for reply in replies:
+                reply.author.profile
+        self.assertEqual(len(replies), 10)
+        self.assertEqual(len(queries), 2)
+
+    def test_foreign_cursor_is_rejected(self):
+        root = self.comment()
+        stranger = self.comment()
+        with self.assertRaises(InvalidCursor):
+            reply_page(root, self.user, cursor=stranger.path)
+        with self.assertRaises(InvalidCursor):
+            reply_page(root, self.user, cursor="not-a-path")
+
+    def test_replies_stop_at_max_depth(self):
+        parent = self.comment()
+        for _ in range(PostComment.MAX_DEPTH):
+            parent = self.comment(parent)
+        self.assertFalse(parent.can_reply)
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("feed:add_comment", args=[self.post.pk]),
+            {"content": "Too deep", "parent_id": parent.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(PostComment.objects.filter(parent=parent).exists())
+        self.assertFalse(PostComment.objects.filter(content="Too deep").exists())
+
+
+def png(name="photo.png", size=(50, 50), noise=False):
+    buffer = BytesIO()
+    image = Image.effect_noise(size, 50) if noise else Image.new("RGB", size)
+    image.save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class SniffTests(SimpleTestCase):
+    def test_recognises_media_by_magic_bytes(self):
+        heads = {
+            b"\xff\xd8\xff\xe0\x00\x10JFIF\x00": "image/jpeg",
+            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR": "image/png",
+            b"GIF89a\x01\x00\x01\x00": "image/gif",
+            b"RIFF\x00\x00\x00\x00WEBPVP8 ": "image/webp",
+            b"\x00\x00\x00\x18ftypmp42\x00\x00": "video/mp4",
+            b"\x00\x00\x00\x14ftypqt  \x00\x00": "video/quicktime",
+            b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81": "video/webm",
+            b"OggS\x00\x02\x00\x00": "video/ogg",
+        }
+        for head, mime in heads.items():
+            self.assertEqual(sniff(head), mime)
+
+    def test_rejects_everything_else(self):
+        for head in (b"", b"<html><body>", b"%PDF-1.7\n", b"RIFF\x00\x00\x00\x00WAVEfmt "):
+            self.assertIsNone(sniff(head))
+
+    def test_iso_media_must_be_mp4_or_quicktime_video(self):
+        for brand in (b"isom", b"iso2", b"mp41", b"avc1"):
+            self.assertEqual(sniff(b"\x00\x00\x00\x18ftyp" + brand + b"\x00\x00\x02\x00"), "video/mp4")
+        for brand in (b"heic", b"mif1", b"avif", b"M4A ", b"3gp4"):
+            self.assertIsNone(sniff(b"\x00\x00\x00\x18ftyp" + brand + b"\x00\x00\x00\x00"), brand)
+
+
+class MediaUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root, JOB_QUEUE_EAGER=True, FEED_UPLOAD_MAX_IMAGE_SIZE=5000
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.client.force_login(self.user)
+        self.url = reverse("feed:create_normal_post")
+
+    def post(self, files):
+        return self.client.post(self.url, {"normal_content": "Hello", "normal_media": files})
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, message)
+        self.assertFalse(FeedPost.objects.exists())
+
+    def test_file_is_stored_under_its_sniffed_type(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([SimpleUploadedFile("photo.txt", png().read(), content_type="text/plain")])
+
+        self.assertEqual(response.status_code, 302)
+        media = PostMedia.objects.get()
+        self.assertEqual(media.media_type, "image")
+        self.assertTrue(media.file.name.endswith(".png"))
+        # Spooled next to storage and moved into place, not copied
+        self.assertEqual(os.listdir(os.path.join(self.media_root, ".uploads")), [])
+
+    def test_non_media_is_rejected_whatever_it_claims(self):
+        fake = SimpleUploadedFile("photo.png", b"<html>" * 10, content_type="image/png")
+        self.assertRejected(self.post([fake]), "is not a supported image or video")
+
+    def test_oversized_image_is_rejected(self):
+        self.assertRejected(self.post([png(size=(200, 200), noise=True)]), "is larger than")
+
+    def test_too_many_files_are_rejected(self):
+        self.assertRejected(self.post([png(f"{i}.png") for i in range(6)]), "Maximum 5 images/videos allowed.")
+
+    @override_settings(FEED_UPLOAD_MAX_REQUEST_SIZE=100)
+    def test_oversized_request_is_rejected_before_parsing(self):
+        self.assertRejected(self.post([png()]), "Uploads are limited to")
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, ".uploads")))
+
+    def test_csrf_is_still_checked(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(self.url, {"normal_content": "Hello", "normal_media": [png()]})
+        self.assertEqual(response.status_code, 403)
+
+
+class TaggingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+
+    def post(self, text):
+        return FeedPost.objects.create(author=self.author, post_type="normal", normal_content=text)
+
+    def tags(self, post):
+        return sorted(post.hashtags.values_list("name", flat=True))
+
+    def test_extract_skips_emails_and_word_glued_marks(self):
+        self.assertEqual(
+            extract("Ping @bob about #Django, issue#12 and a@b.com #django"),
+            (["django"], ["bob"]),
+        )
+
+    def test_extract_reads_html_as_text(self):
+        self.assertEqual(
+            extract('<p style="color:#fff">Tom &amp; Jerry #Real <b>@bob</b></p>', is_html=True),
+            (["real"], ["bob"]),
+        )
+
+    def test_links_follow_edits(self):
+        post = self.post("#old #kept @bob @nobody")
+        tag_feed_post(post, created=True)
+        self.assertEqual(self.tags(post), ["kept", "old"])
+        self.assertEqual(list(post.mentions.values_list("user__username", flat=True)), ["bob"])
+
+        post.normal_content = "#kept #new"
+        post.save()
+        tag_feed_post(post)
+        self.assertEqual(self.tags(post), ["kept", "new"])
+        self.assertFalse(post.mentions.exists())
+
+    def test_query_count_does_not_grow_with_the_tags(self):
+        # The first use also sets up the trending epochs
+        tag_feed_post(self.post("#warmup"), created=True)
+
+        def queries_for(count):
+            post = self.post(" ".join(f"#t{i}" for i in range(count)) + " @bob")
+            with CaptureQueriesContext(connection) as queries:
+                tag_feed_post(post, created=True)
+            self.assertEqual(post.hashtags.count(), count)
+            return len(queries)
+
+        self.assertEqual(queries_for(20), queries_for(40))
+
+    def test_new_posts_are_tagged_on_creation(self):
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse("feed:create_normal_post"), {"normal_content": "Shipping #release today @bob"}
+        )
+        post = FeedPost.objects.get(author=self.author)
+        self.assertEqual(self.tags(post), ["release"])
+        self.assertEqual(post.mentions.get().user, self.bob)
+
+    def test_command_relinks_existing_posts(self):
+        post = self.post("#backfill")
+        out = StringIO()
+        call_command("extract_post_tags", stdout=out)
+        self.assertEqual(self.tags(post), ["backfill"])
+        self.assertIn("Tagged 1 posts", out.getvalue())
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.old, self.new = (HashTag.objects.create(name=name) for name in ("old", "new"))
+
+    def scores(self, window="day"):
+        return {tag.name: tag.trend_score for tag in trending.trending(window=window)}
+
+    def test_recent_uses_outweigh_older_ones(self):
+        for _ in range(3):
+            trending.record([self.old.pk], when=self.now - timedelta(days=2))
+        trending.record([self.new.pk], when=self.now)
+
+        scores = self.scores()
+        self.assertEqual(list(scores), ["new", "old"])
+        self.assertAlmostEqual(scores["old"], 3 * math.exp(-2), places=3)
+
+    def test_recording_takes_no_lock(self):
+        with mock.patch.object(QuerySet, "select_for_update") as select_for_update:
+            trending.record([self.new.pk])
+        select_for_update.assert_not_called()
+
+    def test_old_epoch_is_rebased_once(self):
+        trending.record([self.old.pk], when=self.now)
+        later = self.now + timedelta(days=trending.REBASE_AFTER + 1)
+        trending.record([self.new.pk], when=later)
+
+        epoch = TrendEpoch.objects.get(window="day").epoch
+        self.assertEqual(epoch, later)
+        self.assertAlmostEqual(HashTagTrend.objects.get(window="day", hashtag=self.new).score, 1)
+        # A rebase from the epoch it replaced finds it gone and changes nothing
+        self.assertIsNone(trending._rebase("day", self.now, later + timedelta(days=1)))
+        self.assertEqual(TrendEpoch.objects.get(window="day").epoch, epoch)
+
+    def test_compact_drops_faded_tags(self):
+        trending.record([self.old.pk], when=self.now - timedelta(days=30))
+        trending.record([self.new.pk], when=self.now)
+        trending.compact(self.now)
+
+        self.assertEqual(
+            set(HashTagTrend.objects.filter(window="day").values_list("hashtag__name", flat=True)),
+            {"new"},
+        )
+        self.assertAlmostEqual(self.scores()["new"], 1, places=3)
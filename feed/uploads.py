@@ -0,0 +1,224 @@
+import os
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+# Accepted media, keyed by the MIME type sniffed from the file's first bytes:
+# mime -> (PostMedia.media_type, extension the stored file gets)
+MEDIA_TYPES = {
+    "image/jpeg": ("image", ".jpg"),
+    "image/png": ("image", ".png"),
+    "image/gif": ("image", ".gif"),
+    "image/webp": ("image", ".webp"),
+    "video/mp4": ("video", ".mp4"),
+    "video/quicktime": ("video", ".mov"),
+    "video/webm": ("video", ".webm"),
+    "video/ogg": ("video", ".ogv"),
+}
+
+# Bytes needed to recognise every signature below
+SNIFF_BYTES = 16
+
+# ISO base media major brands accepted as MP4 video; others in the same
+# container (HEIC/AVIF images, M4A audio, ...) are not post media
+MP4_BRANDS = {
+    b"isom", b"iso2", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42", b"avc1", b"M4V ", b"dash",
+}
+
+
+def sniff(head):
+    """MIME type of a file from its leading bytes, or None if not accepted media"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp":
+        # ISO base media: the major brand says what the container holds
+        brand = head[8:12]
+        if brand == b"qt  ":
+            return "video/quicktime"
+        return "video/mp4" if brand in MP4_BRANDS else None
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    if head.startswith(b"OggS"):
+        return "video/ogg"
+    return None
+
+
+class StreamedUpload(UploadedFile):
+    """
+    An upload spooled to a file next to media storage, so that saving it
+    is a rename rather than a copy (FileSystemStorage moves anything that
+    has a temporary_file_path).
+    """
+
+    def __init__(self, name, content_type, media_type, directory):
+        os.makedirs(directory, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(suffix=".upload", dir=directory)
+        super().__init__(file, name, content_type, 0, None)
+        self.media_type = media_type
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The file was moved into storage
+            pass
+
+
+class MediaUploadHandler(FileUploadHandler):
+    """
+    Stream post media to disk, enforcing limits while the data arrives.
+
+    Each file is identified by its magic bytes, not the content type or
+    extension the client claims (the stored name gets the real extension),
+    and capped at FEED_UPLOAD_MAX_IMAGE_SIZE or
+    FEED_UPLOAD_MAX_VIDEO_SIZE; the request as a whole is capped at
+    FEED_UPLOAD_MAX_REQUEST_SIZE and FEED_UPLOAD_MAX_FILES. Rejected files
+    are dropped as soon as they break a rule and the reason is added to
+    `request.upload_errors`; see upload_errors().
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_files = getattr(settings, "FEED_UPLOAD_MAX_FILES", 5)
+        self.max_request_size = getattr(settings, "FEED_UPLOAD_MAX_REQUEST_SIZE", 200 * 1024 * 1024)
+        self.max_sizes = {
+            "image": getattr(settings, "FEED_UPLOAD_MAX_IMAGE_SIZE", 10 * 1024 * 1024),
+            "video": getattr(settings, "FEED_UPLOAD_MAX_VIDEO_SIZE", 100 * 1024 * 1024),
+        }
+        self.directory = getattr(settings, "FEED_UPLOAD_SPOOL_DIR", None) or os.path.join(
+            settings.MEDIA_ROOT, ".uploads"
+        )
+        self.files_seen = 0
+        self.bytes_received = 0
+        self.request_too_large = False
+        if request is not None:
+            request.upload_errors = []
+
+    def _reject(self, message):
+        if self.request is not None:
+            self.request.upload_errors.append(message)
+
+    def _drop_file(self):
+        # Forget the finished file so the parser's cleanup can't close it
+        self.__dict__.pop("file", None)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Turn away an oversized request before reading any of its body
+        if content_length > self.max_request_size:
+            self.request_too_large = True
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._drop_file()
+        self.head = b""
+        self.size = 0
+
+        if self.request_too_large:
+            self._reject(
+                f"Uploads are limited to {filesizeformat(self.max_request_size)} per post."
+            )
+            raise StopUpload(connection_reset=False)
+
+        self.files_seen += 1
+        if self.files_seen > self.max_files:
+            if self.files_seen == self.max_files + 1:
+                self._reject(f"Maximum {self.max_files} images/videos allowed.")
+            raise SkipFile()
+
+    def _open(self):
+        """Identify the file from its buffered head and start spooling it"""
+        mime = sniff(self.head)
+        if mime is None:
+            self._reject(f'"{self.file_name}" is not a supported image or video.')
+            raise SkipFile()
+
+        media_type, extension = MEDIA_TYPES[mime]
+        self.limit = self.max_sizes[media_type]
+        name = os.path.splitext(self.file_name)[0] + extension
+        self.file = StreamedUpload(name, mime, media_type, self.directory)
+
+        head, self.head = self.head, None
+        self._write(head)
+
+    def _write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            self._reject(
+                f'"{self.file_name}" is larger than {filesizeformat(self.limit)}.'
+            )
+            raise SkipFile()
+        self.file.write(data)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.bytes_received += len(raw_data)
+        if self.bytes_received > self.max_request_size:
+            self._reject(
+                f"Uploads are limited to {filesizeformat(self.max_request_size)} per post."
+            )
+            raise StopUpload(connection_reset=False)
+
+        if self.head is None:
+            self._write(raw_data)
+            return None
+
+        self.head += raw_data
+        if len(self.head) >= SNIFF_BYTES:
+            self._open()
+        return None
+
+    def file_complete(self, file_size):
+        if self.head is not None:
+            # Shorter than SNIFF_BYTES, so never opened
+            try:
+                self._open()
+            except SkipFile:
+                if hasattr(self, "file"):
+                    self.file.close()
+                self._drop_file()
+                return None
+
+        self.file.seek(0)
+        self.file.size = self.size
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
+
+
+def upload_errors(request):
+    """Why MediaUploadHandler rejected files in this request, if it did"""
+    return getattr(request, "upload_errors", [])
+
+
+def streams_media_uploads(view):
+    """
+    Parse the view's multipart body with MediaUploadHandler.
+
+    Upload handlers must be swapped before anything reads request.POST,
+    which the CSRF middleware does, so CSRF is checked here instead, after
+    the swap.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [MediaUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return wrapper
@@ -6,6 +6,7 @@ app_name = "feed"
 urlpatterns = [
     # Main feed - NEW SYSTEM (default)
     path("", views.feed_list_new, name="feed_list"),
+    path("api/page/", views.feed_page_api, name="feed_page_api"),
     
     # Post creation - NEW SYSTEM
     path("create/", views.create_post_view, name="create_post"),
@@ -18,6 +19,8 @@ urlpatterns = [
     path("post/<int:pk>/like/", views.toggle_like_new, name="toggle_post_like"),
     path("post/<int:pk>/save/", views.toggle_save_new, name="toggle_save_post"),
     path("post/<int:pk>/comment/", views.add_comment_new, name="add_comment"),
+    path("post/<int:pk>/comments/", views.post_comments_api, name="post_comments"),
+    path("comment/<int:pk>/replies/", views.comment_replies_api, name="comment_replies"),
     path("comment/<int:pk>/like/", views.toggle_comment_like_new, name="toggle_comment_like"),
     path("post/<int:pk>/delete/", views.delete_post_new, name="delete_post"),
     
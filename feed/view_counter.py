@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Write-behind accumulator for `views_count` columns.
+
+    Detail pages call record() instead of saving the row. Views are buffered
+    per (model, pk) in process memory and flushed as
+    `UPDATE ... SET views_count = views_count + n` statements, one per
+    distinct n, once the buffer holds `threshold` views or `interval`
+    seconds have passed since the last flush. The increment is computed by
+    the database, so concurrent workers never lose each other's views.
+
+    Flushes happen after a response is sent (see flush_if_due), never at
+    process exit, when the settings may point at another database (e.g.
+    after the test runner dropped its test database).
+    """
+
+    def __init__(self, interval=10, threshold=100):
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)  # model -> {pk: views}
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, model, pk, views=1):
+        """Buffer `views` for one row"""
+        with self._lock:
+            self._pending[model][pk] += views
+            self._pending_total += views
+
+    def due(self):
+        """Whether a threshold for flushing has been reached"""
+        with self._lock:
+            return bool(self._pending_total) and (
+                self._pending_total >= self.threshold
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+
+    def flush_if_due(self):
+        """Flush if a threshold has been reached; returns the number flushed"""
+        return self.flush() if self.due() else 0
+
+    def pending(self, model, pk):
+        """Views recorded for a row that have not been written yet"""
+        with self._lock:
+            return self._pending.get(model, {}).get(pk, 0)
+
+    def flush(self):
+        """Write all buffered views to the database; returns the number flushed"""
+        with self._lock:
+            batch, self._pending = self._pending, defaultdict(Counter)
+            flushed, self._pending_total = self._pending_total, 0
+            self._last_flush = time.monotonic()
+
+        if not flushed:
+            return 0
+
+        try:
+            with transaction.atomic():
+                for model, counts in batch.items():
+                    # Group rows by increment so each UPDATE covers many rows
+                    by_increment = defaultdict(list)
+                    for pk, views in counts.items():
+                        by_increment[views].append(pk)
+
+                    for views, pks in by_increment.items():
+                        model.objects.filter(pk__in=sorted(pks)).update(
+                            views_count=F("views_count") + views
+                        )
+        except Exception:
+            # Put the views back so the next flush retries them
+            logger.exception("Failed to flush %d buffered views", flushed)
+            with self._lock:
+                for model, counts in batch.items():
+                    self._pending[model].update(counts)
+                self._pending_total += flushed
+            return 0
+
+        return flushed
+
+
+view_counter = ViewCounter(
+    interval=getattr(settings, "VIEW_COUNT_FLUSH_INTERVAL", 10),
+    threshold=getattr(settings, "VIEW_COUNT_FLUSH_THRESHOLD", 100),
+)
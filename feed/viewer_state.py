@@ -0,0 +1,72 @@
+from .models import PostLikeNew, SavedPostNew, CommentLikeNew
+
+
+class ViewerState:
+    """
+    Resolve the viewer's liked/saved flags for a known set of posts and comments.
+
+    Each relation is checked with a single `IN (...)` query restricted to the
+    ids actually on screen, instead of one EXISTS query per post or loading
+    the viewer's entire like/save history.
+
+        state = ViewerState(request.user, post_ids=[...], comment_ids=[...])
+        state.apply(posts=posts, comments=comments)
+    """
+
+    def __init__(self, user, post_ids=(), comment_ids=()):
+        self.liked_post_ids = set()
+        self.saved_post_ids = set()
+        self.liked_comment_ids = set()
+
+        if user is None or not user.is_authenticated:
+            return
+
+        post_ids = list(post_ids)
+        comment_ids = list(comment_ids)
+
+        if post_ids:
+            self.liked_post_ids = set(
+                PostLikeNew.objects.filter(user=user, post_id__in=post_ids)
+                .values_list("post_id", flat=True)
+            )
+            self.saved_post_ids = set(
+                SavedPostNew.objects.filter(user=user, post_id__in=post_ids)
+                .values_list("post_id", flat=True)
+            )
+
+        if comment_ids:
+            self.liked_comment_ids = set(
+                CommentLikeNew.objects.filter(user=user, comment_id__in=comment_ids)
+                .values_list("comment_id", flat=True)
+            )
+
+    @classmethod
+    def for_objects(cls, user, posts=(), comments=()):
+        """Build the state for model instances and annotate them in one step"""
+        posts = list(posts)
+        comments = list(comments)
+        state = cls(
+            user,
+            post_ids=[post.pk for post in posts],
+            comment_ids=[comment.pk for comment in comments],
+        )
+        state.apply(posts=posts, comments=comments)
+        return state
+
+    def apply(self, posts=(), comments=()):
+        """Set is_liked_by_user / is_saved_by_user on each instance for templates"""
+        for post in posts:
+            post.is_liked_by_user = post.pk in self.liked_post_ids
+            post.is_saved_by_user = post.pk in self.saved_post_ids
+
+        for comment in comments:
+            comment.is_liked_by_user = comment.pk in self.liked_comment_ids
+
+    def post_liked(self, post_id):
+        return post_id in self.liked_post_ids
+
+    def post_saved(self, post_id):
+        return post_id in self.saved_post_ids
+
+    def comment_liked(self, comment_id):
+        return comment_id in self.liked_comment_ids
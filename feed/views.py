@@ -1,18 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Count, Prefetch
+from django.db import transaction
+from django.db.models import Q, Count, Max, OuterRef, Prefetch, Subquery, Sum
 from .models import (
-    Post, Comment, PostLike, CommentLike, SavedPost, HashTag, Mention,
+    Post, Comment, PostLike, CommentLike, SavedPost,
     FeedPost, PostMedia, ProjectLink, PostComment, PostLikeNew, CommentLikeNew, SavedPostNew
 )
 from .forms import (
     PostForm, CommentForm, ReplyForm,
     BlogPostForm, ProjectPostForm, NormalPostForm, PostCommentForm
 )
+from .pagination import paginate_feed, InvalidCursor
+from .viewer_state import ViewerState
+from .view_counter import view_counter
+from .comment_tree import comment_page, reply_page
+from .tagging import tag_feed_post, tag_post
+from .uploads import streams_media_uploads, upload_errors
+from .trending import trending
 from accounts.models import Profile
+from riseapp import versions
+from riseapp.conditional import add_validators, not_modified, validators
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -69,9 +80,9 @@ def post_detail(request, pk):
         Post.objects.select_related("author", "author__profile"), pk=pk, is_active=True
     )
 
-    # Increment view count
-    post.views_count += 1
-    post.save(update_fields=["views_count"])
+    # Buffer the view; it is written in a batched UPDATE (see feed.view_counter)
+    view_counter.record(Post, post.pk)
+    post.views_count += view_counter.pending(Post, post.pk)
 
     # Get all comments (including replies)
     comments = (
@@ -135,22 +146,8 @@ def create_post(request):
         post.author = request.user
         post.save()
 
-        # Process hashtags from content
-        import re
-
-        hashtags = re.findall(r"#(\w+)", post.content)
-        for tag in hashtags:
-            hashtag_obj, created = HashTag.objects.get_or_create(name=tag.lower())
-            post.hashtag.add(hashtag_obj)
-
-        # Process mentions from content
-        mentions = re.findall(r"@(\w+)", post.content)
-        for username in mentions:
-            try:
-                mentioned_user = User.objects.get(username=username)
-                Mention.objects.create(post=post, user=mentioned_user)
-            except User.DoesNotExist:
-                pass
+        # Link hashtags and mentions in bulk
+        tag_post(post, created=True)
 
         messages.success(request, "Post created successfully!")
         return redirect("feed:feed_list")
@@ -276,7 +273,8 @@ def edit_post(request, pk):
         form = PostForm(request.POST, request.FILES, instance=post, user=request.user)
 
         if form.is_valid():
-            form.save()
+            post = form.save()
+            tag_post(post)
             messages.success(request, "Post updated successfully!")
             return redirect("feed:post_detail", pk=pk)
 
@@ -390,6 +388,7 @@ def create_blog_post(request):
             post.author = request.user
             post.post_type = "blog"
             post.save()
+            tag_feed_post(post, created=True)
             
             messages.success(request, "Blog post created successfully!")
             return redirect("feed:feed_list")
@@ -406,17 +405,19 @@ def create_blog_post(request):
 
 
 @login_required
+@streams_media_uploads
 def create_project_post(request):
     """View for creating project posts"""
     if request.method == "POST":
         form = ProjectPostForm(request.POST)
         
-        # Handle media files (images/videos)
+        # Handle media files (images/videos), already streamed to disk and
+        # checked by MediaUploadHandler
         media_files = request.FILES.getlist("project_media")
-        
-        # Validate max 5 media files
-        if len(media_files) > 5:
-            messages.error(request, "Maximum 5 images/videos allowed.")
+        errors = upload_errors(request)
+        if errors:
+            for error in errors:
+                messages.error(request, error)
             return render(request, "feed/create_project_post.html", {"form": form, "post_type": "project"})
         
         if form.is_valid():
@@ -424,21 +425,13 @@ def create_project_post(request):
             post.author = request.user
             post.post_type = "project"
             post.save()
+            tag_feed_post(post, created=True)
             
             # Save media files
             for index, media_file in enumerate(media_files):
-                # Determine if it's an image or video
-                content_type = media_file.content_type
-                if content_type.startswith("image/"):
-                    media_type = "image"
-                elif content_type.startswith("video/"):
-                    media_type = "video"
-                else:
-                    continue  # Skip unsupported file types
-                
                 PostMedia.objects.create(
                     post=post,
-                    media_type=media_type,
+                    media_type=media_file.media_type,
                     file=media_file,
                     order=index
                 )
@@ -471,17 +464,19 @@ def create_project_post(request):
 
 
 @login_required
+@streams_media_uploads
 def create_normal_post(request):
     """View for creating normal posts"""
     if request.method == "POST":
         form = NormalPostForm(request.POST)
         
-        # Handle media files (images/videos)
+        # Handle media files (images/videos), already streamed to disk and
+        # checked by MediaUploadHandler
         media_files = request.FILES.getlist("normal_media")
-        
-        # Validate max 5 media files
-        if len(media_files) > 5:
-            messages.error(request, "Maximum 5 images/videos allowed.")
+        errors = upload_errors(request)
+        if errors:
+            for error in errors:
+                messages.error(request, error)
             return render(request, "feed/create_normal_post.html", {"form": form, "post_type": "normal"})
         
         if form.is_valid():
@@ -489,21 +484,13 @@ def create_normal_post(request):
             post.author = request.user
             post.post_type = "normal"
             post.save()
+            tag_feed_post(post, created=True)
             
             # Save media files
             for index, media_file in enumerate(media_files):
-                # Determine if it's an image or video
-                content_type = media_file.content_type
-                if content_type.startswith("image/"):
-                    media_type = "image"
-                elif content_type.startswith("video/"):
-                    media_type = "video"
-                else:
-                    continue  # Skip unsupported file types
-                
                 PostMedia.objects.create(
                     post=post,
-                    media_type=media_type,
+                    media_type=media_file.media_type,
                     file=media_file,
                     order=index
                 )
@@ -522,54 +509,112 @@ def create_normal_post(request):
     return render(request, "feed/create_normal_post.html", context)
 
 
-@login_required
-def feed_list_new(request):
-    """Display the main feed with all new posts"""
-    
-    # Get all active posts, ordered by creation date
+def _feed_queryset(hashtag=None):
+    """Active FeedPosts with everything a feed card renders"""
     posts = (
         FeedPost.objects.filter(is_active=True)
         .select_related("author", "author__profile")
-        .prefetch_related(
-            "media_files",
-            "project_links",
-            "post_likes",
-            "saved_by_new",
-            "post_comments__author",
-        )
-        .order_by("-is_pinned", "-created_at")
+        .prefetch_related("media_files", "project_links")
     )
-    
-    # Add user-specific data for each post
-    if request.user.is_authenticated:
-        for post in posts:
-            post.is_liked_by_user = post.post_likes.filter(user=request.user).exists()
-            post.is_saved_by_user = post.saved_by_new.filter(user=request.user).exists()
-    
-    # Get user's liked posts for UI state
-    liked_posts = set(
-        PostLikeNew.objects.filter(user=request.user).values_list("post_id", flat=True)
-    )
-    
-    # Get user's saved posts
-    saved_posts = set(
-        SavedPostNew.objects.filter(user=request.user).values_list("post_id", flat=True)
-    )
-    
+    if hashtag:
+        posts = posts.filter(hashtags__name=hashtag.lower())
+    return posts
+
+
+@login_required
+def feed_list_new(request):
+    """Display the first page of the main feed; later pages load via feed_page_api"""
+
+    hashtag = request.GET.get("hashtag")
+    posts, next_cursor = paginate_feed(_feed_queryset(hashtag))
+
+    # Add user-specific data for each post on this page
+    viewer_state = ViewerState.for_objects(request.user, posts=posts)
+
     context = {
         "posts": posts,
-        "liked_posts": liked_posts,
-        "saved_posts": saved_posts,
+        "next_cursor": next_cursor,
+        "liked_posts": viewer_state.liked_post_ids,
+        "saved_posts": viewer_state.saved_post_ids,
         "comment_form": PostCommentForm(),
+        "active_hashtag": hashtag,
+        "trending_tags": trending(10, "day"),
     }
     
     return render(request, "feed/feed_list_new.html", context)
 
 
+@login_required
+def feed_page_api(request):
+    """Return the next slice of the feed for infinite scroll (AJAX endpoint)"""
+
+    try:
+        posts, next_cursor = paginate_feed(
+            _feed_queryset(request.GET.get("hashtag")), cursor=request.GET.get("cursor")
+        )
+    except InvalidCursor:
+        return JsonResponse({"success": False, "error": "Invalid cursor."}, status=400)
+
+    ViewerState.for_objects(request.user, posts=posts)
+
+    html = render_to_string(
+        "feed/partials/post_list.html", {"posts": posts}, request=request
+    )
+
+    return JsonResponse({
+        "success": True,
+        "html": html,
+        "next_cursor": next_cursor,
+    })
+
+
 @login_required
 def post_detail_new(request, pk):
     """Display a single post with all its comments"""
-    
+
+    # Everything the page shows bumps one of these, so an unchanged page
+    # can be answered with 304 before any of the work below. Counts alone
+    # can hide the viewer's own changes (their like plus someone's unlike),
+    # so their likes and save are included too: liking afresh adds a row
+    # with a higher pk, unliking removes one.
+    comment_likes = (
+        CommentLikeNew.objects.filter(user=request.user, comment__post=OuterRef("pk"))
+        .order_by()
+        .values("user")
+    )
+    state = (
+        FeedPost.objects.filter(pk=pk, is_active=True)
+        .annotate(
+            comments_updated=Max("post_comments__updated_at"),
+            comment_likes=Sum("post_comments__like_count"),
+            viewer_like=Subquery(
+                PostLikeNew.objects.filter(user=request.user, post=OuterRef("pk")).values("pk")
+            ),
+            viewer_save=Subquery(
+                SavedPostNew.objects.filter(user=request.user, post=OuterRef("pk")).values("pk")
+            ),
+            viewer_comment_likes=Subquery(comment_likes.annotate(n=Count("pk")).values("n")),
+            viewer_comment_like_max=Subquery(comment_likes.annotate(m=Max("pk")).values("m")),
+        )
+        .values_list(
+            "updated_at", "like_count", "comment_count", "save_count",
+            "comments_updated", "comment_likes", "viewer_like", "viewer_save",
+            "viewer_comment_likes", "viewer_comment_like_max",
+        )
+        .first()
+    )
+    if state is None:
+        raise Http404("No FeedPost matches the given query.")
+
+    # Buffer the view; it is written in a batched UPDATE (see feed.view_counter)
+    view_counter.record(FeedPost, pk)
+
+    token, _ = versions.stamp("accounts.User", "accounts.Profile")
+    etag, last_modified = validators(request, "post", pk, token, *state)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
     post = get_object_or_404(
         FeedPost.objects.select_related("author", "author__profile")
         .prefetch_related("media_files", "project_links"),
@@ -577,32 +622,67 @@ def post_detail_new(request, pk):
         is_active=True
     )
     
-    # Increment view count
-    post.views_count += 1
-    post.save(update_fields=["views_count"])
+    post.views_count += view_counter.pending(FeedPost, post.pk)
     
-    # Get all comments
-    comments = (
-        post.post_comments.select_related("author", "author__profile", "parent")
-        .prefetch_related("comment_likes_new")
-        .order_by("created_at")
-    )
+    # First page of top-level comments; the rest and all replies load on demand
+    comments, comments_cursor = comment_page(post, request.user)
     
-    # Check if user liked the post
-    user_has_liked = PostLikeNew.objects.filter(post=post, user=request.user).exists()
-    
-    # Check if user saved the post
-    user_has_saved = SavedPostNew.objects.filter(post=post, user=request.user).exists()
+    # Liked/saved flags for the post itself
+    viewer_state = ViewerState.for_objects(request.user, posts=[post])
     
     context = {
         "post": post,
         "comments": comments,
-        "user_has_liked": user_has_liked,
-        "user_has_saved": user_has_saved,
+        "comments_cursor": comments_cursor,
+        "user_has_liked": viewer_state.post_liked(post.pk),
+        "user_has_saved": viewer_state.post_saved(post.pk),
         "comment_form": PostCommentForm(),
     }
     
-    return render(request, "feed/post_detail_new.html", context)
+    return add_validators(
+        request, render(request, "feed/post_detail_new.html", context), etag, last_modified
+    )
+
+
+def _comment_page_response(request, comments, next_cursor):
+    html = render_to_string(
+        "feed/partials/comment_list.html", {"comments": comments}, request=request
+    )
+    return JsonResponse({
+        "success": True,
+        "html": html,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required
+def post_comments_api(request, pk):
+    """Return the next page of a post's top-level comments (AJAX endpoint)"""
+    post = get_object_or_404(FeedPost, pk=pk, is_active=True)
+
+    try:
+        comments, next_cursor = comment_page(
+            post, request.user, cursor=request.GET.get("cursor")
+        )
+    except InvalidCursor:
+        return JsonResponse({"success": False, "error": "Invalid cursor."}, status=400)
+
+    return _comment_page_response(request, comments, next_cursor)
+
+
+@login_required
+def comment_replies_api(request, pk):
+    """Return a page of a comment's replies, at every depth (AJAX endpoint)"""
+    comment = get_object_or_404(PostComment, pk=pk, post__is_active=True)
+
+    try:
+        replies, next_cursor = reply_page(
+            comment, request.user, cursor=request.GET.get("cursor")
+        )
+    except InvalidCursor:
+        return JsonResponse({"success": False, "error": "Invalid cursor."}, status=400)
+
+    return _comment_page_response(request, replies, next_cursor)
 
 
 @login_required
@@ -611,18 +691,22 @@ def toggle_like_new(request, pk):
     """Toggle like on a post"""
     post = get_object_or_404(FeedPost, pk=pk)
     
-    like, created = PostLikeNew.objects.get_or_create(post=post, user=request.user)
+    # The like row and the counter update (feed.signals) commit together
+    with transaction.atomic():
+        like, created = PostLikeNew.objects.get_or_create(post=post, user=request.user)
+        
+        if not created:
+            like.delete()
+            liked = False
+        else:
+            liked = True
     
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    post.refresh_from_db(fields=["like_count"])
     
     return JsonResponse({
         "success": True,
         "liked": liked,
-        "likes_count": post.likes_count,
+        "likes_count": post.like_count,
     })
 
 
@@ -641,10 +725,14 @@ def add_comment_new(request, pk):
         # Check if it's a reply
         parent_id = request.POST.get("parent_id")
         if parent_id:
-            parent_comment = get_object_or_404(PostComment, pk=parent_id)
+            parent_comment = get_object_or_404(PostComment, pk=parent_id, post=post)
+            if not parent_comment.can_reply:
+                messages.error(request, "This thread is too deep to reply to.")
+                return redirect("feed:post_detail", pk=pk)
             comment.parent = parent_comment
         
-        comment.save()
+        with transaction.atomic():
+            comment.save()
         messages.success(request, "Comment added successfully!")
     else:
         messages.error(request, "Failed to add comment.")
@@ -668,13 +756,14 @@ def toggle_save_new(request, pk):
     """Toggle save on a post"""
     post = get_object_or_404(FeedPost, pk=pk)
     
-    saved, created = SavedPostNew.objects.get_or_create(post=post, user=request.user)
-    
-    if not created:
-        saved.delete()
-        is_saved = False
-    else:
-        is_saved = True
+    with transaction.atomic():
+        saved, created = SavedPostNew.objects.get_or_create(post=post, user=request.user)
+        
+        if not created:
+            saved.delete()
+            is_saved = False
+        else:
+            is_saved = True
     
     return JsonResponse({
         "success": True,
@@ -688,16 +777,19 @@ def toggle_comment_like_new(request, pk):
     """Toggle like on a comment"""
     comment = get_object_or_404(PostComment, pk=pk)
     
-    like, created = CommentLikeNew.objects.get_or_create(comment=comment, user=request.user)
+    with transaction.atomic():
+        like, created = CommentLikeNew.objects.get_or_create(comment=comment, user=request.user)
+        
+        if not created:
+            like.delete()
+            liked = False
+        else:
+            liked = True
     
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    comment.refresh_from_db(fields=["like_count"])
     
     return JsonResponse({
         "success": True,
         "liked": liked,
-        "likes_count": comment.comment_likes_new.count(),
+        "likes_count": comment.like_count,
     })
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Contact, FAQ, Testimonial, Newsletter
+from .models import Contact, FAQ, Testimonial, Newsletter, Job
 
 # Register your models here.
 
@@ -56,3 +56,12 @@ class TestimonialAdmin(admin.ModelAdmin):
     list_filter = ('stars', 'created_at')
     search_fields = ('user__username', 'user__email', 'name', 'message')
     ordering = ('-created_at',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'priority', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'idempotency_key', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_until', 'last_error')
+    ordering = ('-created_at',)
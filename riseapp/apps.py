@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RiseappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'riseapp'
+
+    def ready(self):
+        import riseapp.checks  # Database settings self-check
+        import riseapp.signals  # Render image variants on upload
@@ -0,0 +1,82 @@
+# riseapp/checks.py
+
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+
+
+def effective_settings(alias):
+    """What a database connection actually runs with, read back from it"""
+    connection = connections[alias]
+    settings = connection.settings_dict
+    report = {
+        "engine": connection.vendor,
+        "name": str(settings["NAME"]),
+        "conn_max_age": settings["CONN_MAX_AGE"],
+        "health_checks": settings["CONN_HEALTH_CHECKS"],
+    }
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            report["transaction_mode"] = connection.transaction_mode or "DEFERRED"
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size"):
+                cursor.execute(f"PRAGMA {pragma}")
+                # mmap_size returns no row for in-memory databases and on
+                # builds compiled without mmap
+                row = cursor.fetchone()
+                report[pragma] = row[0] if row else None
+        elif connection.vendor == "postgresql":
+            report["host"] = settings["HOST"] or "local socket"
+            report["pool"] = settings["OPTIONS"].get("pool") or "off"
+            cursor.execute("SHOW server_version")
+            report["server_version"] = cursor.fetchone()[0]
+    return report
+
+
+@register(Tags.database)
+def check_database_settings(app_configs, databases=None, **kwargs):
+    """
+    Warn when a database ignored the tuning in settings (e.g. WAL is not
+    available for the database file's filesystem).
+    """
+    warnings = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != "sqlite" or connection.is_in_memory_db():
+            continue
+        report = effective_settings(alias)
+        if report["journal_mode"] != "wal":
+            warnings.append(
+                Warning(
+                    f"SQLite database {alias!r} uses journal_mode="
+                    f"{report['journal_mode']} instead of WAL, so every write "
+                    "blocks readers.",
+                    hint="Keep the database file on a local filesystem.",
+                    id="riseapp.W001",
+                )
+            )
+        if not report["busy_timeout"]:
+            warnings.append(
+                Warning(
+                    f"SQLite database {alias!r} has no busy_timeout; concurrent "
+                    'writes fail with "database is locked".',
+                    hint="Set SQLITE_BUSY_TIMEOUT in the environment.",
+                    id="riseapp.W002",
+                )
+            )
+    return warnings
+
+
+@register(deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    """Warn when a Postgres database opens a new connection for every request"""
+    return [
+        Warning(
+            f"Database {connection.alias!r} opens a new connection for every request.",
+            hint="Set DATABASE_CONN_MAX_AGE, or DATABASE_POOL_SIZE with psycopg 3.",
+            id="riseapp.W003",
+        )
+        for connection in connections.all(initialized_only=False)
+        if connection.vendor == "postgresql"
+        and not connection.settings_dict["CONN_MAX_AGE"]
+        and not connection.settings_dict["OPTIONS"].get("pool")
+    ]
@@ -0,0 +1,138 @@
+# riseapp/conditional.py
+
+import hashlib
+import os
+from functools import cache, wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.template.utils import get_app_template_dirs
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import pagecache, versions
+
+
+@cache
+def template_revision():
+    """
+    When templates last changed on disk, read once per process: pages
+    depend on them as much as on their data, so a deploy that edits a
+    template gets new ETags.
+    """
+    dirs = [*settings.TEMPLATES[0]["DIRS"], *get_app_template_dirs("templates")]
+    return max(
+        (
+            os.stat(os.path.join(root, name)).st_mtime_ns
+            for directory in dirs
+            for root, _, names in os.walk(directory)
+            for name in names
+        ),
+        default=0,
+    )
+
+
+def _digest(*parts):
+    key = ":".join(str(part) for part in parts)
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def has_messages(request):
+    """
+    Whether flash messages wait to be shown: a page showing them is a
+    one-off, never to be answered with 304 or shared.
+    """
+    return bool(len(get_messages(request)))
+
+
+def validators(request, *parts, last_modified=None):
+    """
+    An ETag for a page built from `parts` for this visitor, and its
+    Last-Modified timestamp.
+
+    Pages differ per visitor (navigation, like state, CSRF tokens), so the
+    user and their CSRF cookie are part of the ETag: after logging in or
+    out, a revalidated page would otherwise keep forms with a stale token.
+    A date can't tell visitors apart, so signed-in ones get no
+    Last-Modified.
+    """
+    authenticated = request.user.is_authenticated
+    etag = '"%s"' % _digest(
+        template_revision(),
+        request.user.pk if authenticated else "-",
+        request.META.get("CSRF_COOKIE"),
+        *parts,
+    )
+    if authenticated:
+        return etag, None
+    changed = int(last_modified.timestamp()) if last_modified else 0
+    return etag, max(changed, template_revision() // 10**9) or None
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the client's copy is current, else None"""
+    if request.method not in ("GET", "HEAD") or has_messages(request):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return response if response is not None and response.status_code == 304 else None
+
+
+def add_validators(request, response, etag, last_modified):
+    """Let clients revalidate this response instead of downloading it again"""
+    if (
+        response.status_code == 200
+        and not response.has_header("ETag")
+        and not has_messages(request)
+    ):
+        response["ETag"] = etag
+        if last_modified and not response.has_header("Last-Modified"):
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def conditional_page(*labels, detail=None, cache_anonymous=False):
+    """
+    Answer GET/HEAD with 304 Not Modified, without running the view, while
+    none of the models in `labels` changed (see versions.TRACKED).
+
+    `detail(request, *args, **kwargs)` may add the page's own object as a
+    (key, updated_at) pair; when it returns None (e.g. no such object) the
+    view runs unconditionally.
+
+    With cache_anonymous, anonymous visitors also share a cached copy of the
+    page (see pagecache), so the view runs once per version of its content.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token, last_modified = versions.stamp(*labels)
+            parts = [view.__name__, request.get_full_path(), token]
+            if detail is not None:
+                found = detail(request, *args, **kwargs)
+                if found is None:
+                    return view(request, *args, **kwargs)
+                key, updated_at = found
+                parts.append(key)
+                last_modified = max(filter(None, (last_modified, updated_at)), default=None)
+
+            etag, timestamp = validators(request, *parts, last_modified=last_modified)
+            response = not_modified(request, etag, timestamp)
+            if response is not None:
+                return response
+
+            # Anonymous visitors share a copy, whatever their CSRF token
+            shared = cache_anonymous and pagecache.cacheable(request)
+            version = _digest(template_revision(), *parts) if shared else None
+            response = pagecache.fetch(request, version) if shared else None
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if shared:
+                    pagecache.store(request, version, response)
+            return add_validators(request, response, etag, timestamp)
+
+        return wrapper
+
+    return decorator
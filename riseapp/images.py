@@ -0,0 +1,176 @@
+# riseapp/images.py
+
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import versions
+from .storage import DERIVED_DIR
+
+# Rendition widths per kind of slot (CSS pixels x 1, 2 and more for HiDPI)
+AVATAR_WIDTHS = (48, 96, 192)
+THUMBNAIL_WIDTHS = (400, 800)
+MEDIA_WIDTHS = (240, 480, 960, 1600)
+
+# Image fields that get renditions, and the widths they are rendered at.
+# Each field stores its renditions in a sibling JSONField "<field>_variants".
+VARIANT_FIELDS = {
+    "feed.PostMedia": {"file": MEDIA_WIDTHS},
+    "feed.FeedPost": {"blog_thumbnail": THUMBNAIL_WIDTHS},
+    "community.Blog": {"thumbnail": THUMBNAIL_WIDTHS},
+    "community.Project": {"thumbnail": THUMBNAIL_WIDTHS},
+    "accounts.Profile": {"profile_pic": AVATAR_WIDTHS},
+}
+
+# format -> (file extension, Pillow save options)
+FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variants_field(field):
+    return f"{field}_variants"
+
+
+def _prepare(image, fmt):
+    """Convert to a mode the target format can store"""
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    if fmt == "webp":
+        return image.convert("RGBA" if has_alpha else "RGB")
+    if has_alpha:
+        # JPEG has no alpha channel; flatten onto white
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(fieldfile, widths):
+    """
+    Write WebP and JPEG renditions of an image at the given widths.
+
+    Widths wider than the original are capped to it (images are never
+    upscaled). Rendition names derive from the source name, and uploads
+    always get fresh names, so an existing rendition is reused rather than
+    rendered again (e.g. the shared default avatar).
+
+    Returns {"source": name, "webp": {width: name}, "jpeg": {width: name}},
+    or {} when the file is missing or not an image (e.g. a video).
+    """
+    if not fieldfile or not fieldfile.name:
+        return {}
+
+    # Renditions are stored under their own names, not by content
+    storage = getattr(fieldfile.storage, "derived", fieldfile.storage)
+    try:
+        with storage.open(fieldfile.name, "rb") as source:
+            image = Image.open(source)
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError):
+        return {}
+
+    image = ImageOps.exif_transpose(image)
+    folder, filename = posixpath.split(fieldfile.name)
+    stem = posixpath.splitext(filename)[0]
+
+    variants = {"source": fieldfile.name}
+    for fmt in FORMATS:
+        variants[fmt] = {}
+
+    for width in sorted({min(width, image.width) for width in widths}):
+        resized = None
+        for fmt, (extension, options) in FORMATS.items():
+            name = posixpath.join(folder, DERIVED_DIR, f"{stem}-{width}w.{extension}")
+            if not storage.exists(name):
+                if resized is None:
+                    height = max(round(image.height * width / image.width), 1)
+                    resized = image.resize((width, height), Image.LANCZOS)
+                buffer = BytesIO()
+                _prepare(resized, fmt).save(buffer, **options)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants[fmt][str(width)] = name
+
+    return variants
+
+
+def variants_stale(instance, field):
+    """Whether an instance's image changed since its renditions were made"""
+    current = getattr(instance, variants_field(field)) or {}
+    return current.get("source", "") != (getattr(instance, field).name or "")
+
+
+def refresh_variants(instance, field, force=False):
+    """
+    Re-render an instance's renditions if its image changed since they were made.
+
+    Stores the result with a queryset UPDATE (no save signals) and returns
+    True when the renditions were rewritten.
+    """
+    model = type(instance)
+    widths = VARIANT_FIELDS[model._meta.label][field]
+    fieldfile = getattr(instance, field)
+    current = getattr(instance, variants_field(field)) or {}
+
+    if not force and not variants_stale(instance, field):
+        return False
+
+    variants = render_variants(fieldfile, widths)
+    if variants == current:
+        return False
+
+    model.objects.filter(pk=instance.pk).update(**{variants_field(field): variants})
+    setattr(instance, variants_field(field), variants)
+    if model._meta.label in versions.TRACKED:
+        # Pages showing the image can now offer its renditions
+        versions.bump(model._meta.label)
+    return True
+
+
+def _renditions(instance, field, fmt):
+    """
+    {width: name} of the renditions in one format, or {} unless they were
+    made from the image the field holds now (e.g. a new upload whose
+    renditions are still queued)
+    """
+    variants = getattr(instance, variants_field(field), None) or {}
+    if variants.get("source", "") != (getattr(instance, field).name or ""):
+        return {}
+    return variants.get(fmt) or {}
+
+
+def srcset(instance, field, fmt="webp"):
+    """A `srcset` value for an image field, or "" if it has no current renditions"""
+    variants = _renditions(instance, field, fmt)
+    if not variants:
+        return ""
+
+    storage = getattr(instance, field).storage
+    return ", ".join(
+        f"{storage.url(name)} {width}w"
+        for width, name in sorted(variants.items(), key=lambda item: int(item[0]))
+    )
+
+
+def variant_url(instance, field, width, fmt="jpeg"):
+    """URL of the smallest rendition at least `width` wide, else the original"""
+    fieldfile = getattr(instance, field)
+    variants = _renditions(instance, field, fmt)
+    for rendition_width, name in sorted(variants.items(), key=lambda item: int(item[0])):
+        if int(rendition_width) >= width:
+            return fieldfile.storage.url(name)
+    return fieldfile.url if fieldfile else ""
+
+
+def variant_models():
+    """(model, field) pairs that carry renditions"""
+    for label, fields in VARIANT_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            yield model, field
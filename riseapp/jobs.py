@@ -0,0 +1,222 @@
+# riseapp/jobs.py
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions by name; see task()
+TASKS = {}
+
+# Retry delays grow as BACKOFF_BASE * 2**(attempt - 1), up to BACKOFF_MAX,
+# with jitter so failed jobs don't retry in lockstep
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(hours=1)
+
+# Ready jobs looked at per claim; more than one lets workers that lose a
+# race for the first job move on to the next
+CLAIM_BATCH = 10
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=5, timeout=300, every=None):
+    """
+    Register a function as a background task.
+
+    Tasks live in an app's tasks.py (workers import those on start), take
+    JSON-serializable arguments and may run more than once, so they should
+    be idempotent. The keyword options are defaults for enqueue().
+
+    A task with `every` (a timedelta) runs periodically without arguments:
+    workers queue it when they start (see schedule_periodic), and each run
+    queues the next one `every` after it finishes, whether it succeeded or
+    ran out of attempts.
+    """
+
+    def register(func):
+        func.task_name = name or f"{func.__module__}.{func.__qualname__}"
+        func.task_options = {
+            "priority": priority,
+            "max_attempts": max_attempts,
+            "timeout": timeout,
+        }
+        func.every = every
+        TASKS[func.task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(func, args=(), kwargs=None, *, priority=None, delay=None,
+            idempotency_key=None, max_attempts=None, timeout=None):
+    """
+    Queue a call of a registered task and return its Job.
+
+    The job is only visible to workers once the surrounding transaction
+    commits. With an idempotency_key, a job still queued or running under
+    that key is returned instead of adding another; once that job has
+    finished, the same key queues a new one. With JOB_QUEUE_EAGER
+    the job is run in-process right after commit, which suits development
+    and tests.
+    """
+    options = dict(func.task_options)
+    for option, value in (
+        ("priority", priority), ("max_attempts", max_attempts), ("timeout", timeout),
+    ):
+        if value is not None:
+            options[option] = value
+
+    job = Job(
+        task=func.task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=timezone.now() + (delay or timedelta(0)),
+        idempotency_key=idempotency_key,
+        **options,
+    )
+    if idempotency_key is None:
+        job.save()
+    else:
+        while True:
+            try:
+                with transaction.atomic():
+                    job.save()
+                break
+            except IntegrityError:
+                existing = Job.objects.filter(idempotency_key=idempotency_key).first()
+                if existing is not None:
+                    return existing
+                # It finished (releasing the key) in the meantime
+
+    if getattr(settings, "JOB_QUEUE_EAGER", False):
+        transaction.on_commit(lambda: run_next(worker_name(), pk=job.pk))
+    return job
+
+
+def _periodic_key(func):
+    return f"periodic:{func.task_name}"
+
+
+def schedule_periodic():
+    """Queue every periodic task that has no run queued yet"""
+    for func in TASKS.values():
+        if func.every is not None:
+            enqueue(func, idempotency_key=_periodic_key(func))
+
+
+def _reschedule(job, func):
+    # Only the scheduled instance queues the next run, so a periodic task
+    # also run by hand doesn't end up scheduled twice
+    if func is not None and func.every is not None and job.idempotency_key == _periodic_key(func):
+        enqueue(func, delay=func.every, idempotency_key=job.idempotency_key)
+
+
+def worker_name():
+    """Identifies a worker thread in Job.locked_by"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _ready(now):
+    # Queued and due, or claimed by a worker that let its timeout lapse
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_until__lt=now
+    )
+
+
+def claim(worker, now=None, pk=None):
+    """
+    Take the most urgent ready job for `worker`, or None if there is none.
+
+    A job is claimed by a conditional UPDATE that only succeeds while it is
+    still ready, so concurrent workers never run the same job, with no need
+    for row locks (which SQLite doesn't have). The job then stays invisible
+    to other workers for its timeout.
+    """
+    now = now or timezone.now()
+    candidates = Job.objects.filter(_ready(now))
+    if pk is not None:
+        candidates = candidates.filter(pk=pk)
+
+    for job_id, timeout in candidates.order_by("-priority", "run_at", "pk").values_list(
+        "pk", "timeout"
+    )[:CLAIM_BATCH]:
+        claimed = Job.objects.filter(_ready(now), pk=job_id).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=timeout),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def _finish(job, worker, **fields):
+    # Only the current claimant may settle a job: one whose timeout lapsed
+    # may already be running elsewhere
+    if fields["status"] in (Job.DONE, Job.FAILED):
+        # Free the key, so the same work can be queued again later
+        fields["idempotency_key"] = None
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=worker).update(
+        locked_until=None, **fields
+    )
+
+
+def _backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run(job, worker):
+    """Run a claimed job, then mark it done or schedule its retry"""
+    now = timezone.now()
+    func = TASKS.get(job.task)
+    try:
+        if job.attempts > job.max_attempts:
+            # Its earlier runs all timed out
+            raise RuntimeError(f"Gave up after {job.max_attempts} attempts")
+        if func is None:
+            raise LookupError(f"Unknown task: {job.task}")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %d", job.pk, job.task, job.attempts)
+        if func is None or job.attempts >= job.max_attempts:
+            if _finish(job, worker, status=Job.FAILED, last_error=error, finished_at=now):
+                _reschedule(job, func)
+        else:
+            _finish(
+                job, worker, status=Job.QUEUED, last_error=error,
+                run_at=timezone.now() + _backoff(job.attempts),
+            )
+        return False
+
+    if _finish(job, worker, status=Job.DONE, finished_at=timezone.now()):
+        _reschedule(job, func)
+    return True
+
+
+def run_next(worker, pk=None):
+    """Claim and run one job; returns False when none was ready"""
+    job = claim(worker, pk=pk)
+    if job is None:
+        return False
+    run(job, worker)
+    return True
+
+
+def load_tasks():
+    """Import every installed app's tasks module so its tasks register"""
+    autodiscover_modules("tasks")
@@ -0,0 +1,28 @@
+# riseapp/management/commands/check_database.py
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from riseapp.checks import effective_settings
+
+
+class Command(BaseCommand):
+    help = "Connect to the database and show the settings it actually runs with"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            choices=tuple(connections),
+            help="Database alias to check (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        report = effective_settings(alias)
+        for key, value in report.items():
+            self.stdout.write(f"{key:>16}: {value}")
+
+        # Warnings from the database self-check (riseapp/checks.py)
+        self.check(databases=[alias])
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted! Database {alias!r} is reachable."))
@@ -0,0 +1,35 @@
+# riseapp/management/commands/generate_image_variants.py
+
+from django.core.management.base import BaseCommand
+
+from riseapp.images import refresh_variants, variant_models
+
+
+class Command(BaseCommand):
+    help = "Render resized WebP/JPEG variants for uploaded images that lack them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render variants even when they are up to date",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field in variant_models():
+            queryset = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            if model._meta.label == "feed.PostMedia":
+                queryset = queryset.filter(media_type="image")
+
+            rendered = 0
+            for instance in queryset.iterator(chunk_size=200):
+                if refresh_variants(instance, field, force=options["force"]):
+                    rendered += 1
+
+            total += rendered
+            self.stdout.write(f"{model._meta.label}.{field}: {rendered} rendered")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nCompleted! Rendered variants for {total} image(s).")
+        )
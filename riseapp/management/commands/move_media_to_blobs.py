@@ -0,0 +1,53 @@
+# riseapp/management/commands/move_media_to_blobs.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from riseapp.storage import BLOB_ROOT, file_fields
+
+
+class Command(BaseCommand):
+    help = "Copy files uploaded before content-addressed storage into it, deduplicating them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete-originals",
+            action="store_true",
+            help="Remove each original file once no row refers to it any more",
+        )
+
+    def handle(self, *args, **options):
+        moved = 0
+        for model in apps.get_models():
+            for field in file_fields(model):
+                legacy = (
+                    model._default_manager.exclude(**{f"{field.attname}__startswith": BLOB_ROOT + "/"})
+                    .exclude(**{field.attname: ""})
+                    .exclude(**{f"{field.attname}__isnull": True})
+                )
+                originals = set()
+                count = 0
+                for instance in legacy.iterator(chunk_size=200):
+                    fieldfile = getattr(instance, field.attname)
+                    if not field.storage.exists(fieldfile.name):
+                        continue
+                    with field.storage.open(fieldfile.name, "rb") as original:
+                        name = field.storage.save(fieldfile.name, original)
+                    originals.add(fieldfile.name)
+                    setattr(instance, field.attname, name)
+                    instance.save(update_fields=[field.attname])
+                    count += 1
+
+                if options["delete_originals"]:
+                    still_used = set(
+                        model._default_manager.filter(
+                            **{f"{field.attname}__in": originals}
+                        ).values_list(field.attname, flat=True)
+                    )
+                    for name in originals - still_used:
+                        field.storage.derived.delete(name)
+
+                moved += count
+                self.stdout.write(f"{model._meta.label}.{field.name}: {count} moved")
+
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted! Moved {moved} file(s)."))
@@ -0,0 +1,84 @@
+# riseapp/management/commands/run_workers.py
+
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from riseapp.jobs import load_tasks, run_next, schedule_periodic, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs until stopped (see riseapp/jobs.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of worker threads",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds an idle worker waits before looking for jobs again",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is ready instead of waiting for more",
+        )
+
+    def _work(self, stop, poll_interval, burst):
+        """One worker thread: run jobs until stopped; returns how many ran"""
+        worker = worker_name()
+        ran = 0
+        try:
+            while not stop.is_set():
+                try:
+                    found = run_next(worker)
+                except DatabaseError:
+                    # e.g. the database is locked or restarting: retry later
+                    logger.exception("Worker %s could not claim a job", worker)
+                    connections.close_all()
+                    stop.wait(poll_interval)
+                    continue
+                if found:
+                    ran += 1
+                elif burst:
+                    break
+                else:
+                    stop.wait(poll_interval)
+        finally:
+            # Each thread has its own database connection
+            connections.close_all()
+        return ran
+
+    def handle(self, *args, **options):
+        load_tasks()
+        schedule_periodic()
+        concurrency = max(options["concurrency"], 1)
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping after the jobs in progress...")
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(f"Running {concurrency} worker(s)...")
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(self._work, stop, options["poll_interval"], options["burst"])
+                for _ in range(concurrency)
+            ]
+            ran = sum(future.result() for future in futures)
+
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted! Ran {ran} job(s)."))
@@ -111,3 +111,78 @@ class Achievement(models.Model):
 
     def __str__(self):
         return self.title
+
+
+# ------------------ JOB QUEUE ------------------
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_workers` (see riseapp/jobs.py)"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # Seconds a claimed job stays invisible to other workers; if it is not
+    # finished by then its worker is presumed dead and the job is run again
+    timeout = models.PositiveIntegerField(default=300)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    # Enqueueing again with the key of a queued or running job returns that
+    # job; the key is cleared when the job finishes, so it can run again
+    idempotency_key = models.CharField(max_length=200, null=True, blank=True, unique=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_ready_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
+
+
+# ------------------ MEDIA BLOBS ------------------
+class Blob(models.Model):
+    """
+    A stored file in content-addressed storage and how many file fields
+    refer to it (see riseapp/storage.py)
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+# ------------------ CONTENT VERSIONS ------------------
+class ContentVersion(models.Model):
+    """
+    A counter bumped whenever rows of a model change, so pages built from
+    that model can tell cheaply whether they are stale (see riseapp/versions.py)
+    """
+
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
@@ -0,0 +1,72 @@
+# riseapp/pagecache.py
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+# Every page carries a CSRF token (the newsletter form in the footer). It is
+# swapped for this marker in the cached copy and for the visitor's own token
+# when served.
+CSRF_MARKER = b"\x00csrf-token\x00"
+CSRF_INPUT_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([A-Za-z0-9]+)"')
+
+# Response headers worth keeping with a cached page
+KEPT_HEADERS = ("Content-Type", "Content-Language", "X-Frame-Options")
+
+
+def cacheable(request):
+    """
+    Whether a request can share the cached copy of a page: an anonymous
+    GET/HEAD with no flash messages waiting to be shown.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _key(request, version):
+    # The version already identifies the page's content, so a new version
+    # of any model it shows simply misses the cache
+    path = hashlib.md5(
+        request.get_full_path().encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"page:{path}:{version}"
+
+
+def fetch(request, version):
+    """The cached copy of the page, with this visitor's CSRF token, or None"""
+    cached = cache.get(_key(request, version))
+    if cached is None:
+        return None
+
+    headers, content = cached
+    if CSRF_MARKER in content:
+        content = content.replace(CSRF_MARKER, get_token(request).encode())
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def store(request, version, response):
+    """Keep a rendered page for other anonymous visitors, for PAGE_CACHE_TIMEOUT"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+
+    content = response.content
+    match = CSRF_INPUT_RE.search(content)
+    if match:
+        content = content.replace(match.group(1), CSRF_MARKER)
+    headers = {h: response[h] for h in KEPT_HEADERS if response.has_header(h)}
+    cache.set(
+        _key(request, version),
+        (headers, content),
+        getattr(settings, "PAGE_CACHE_TIMEOUT", 600),
+    )
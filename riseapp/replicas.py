@@ -0,0 +1,94 @@
+# riseapp/replicas.py
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models whose reads may be served by a replica during a request: the feed,
+# community pages and profiles. ContentVersion goes with them so that a
+# page's ETag (see conditional.py) is computed from the same copy of the
+# data as the page itself.
+REPLICA_APPS = ("feed", "community", "accounts")
+REPLICA_MODELS = ("riseapp.ContentVersion",)
+
+# Set on a response after its request wrote to the database; while it lasts,
+# that browser reads from the primary, so it sees its own writes even if the
+# replicas lag behind
+PIN_COOKIE = "db_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The replica serving the current request (None to read from the primary)
+# and whether the request has written anything. Outside a request
+# (management commands, workers) everything uses the primary.
+_replica = ContextVar("replica", default=None)
+_wrote = ContextVar("wrote", default=False)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class ReplicaRouter:
+    """
+    Send reads of the feed, community and profile models to the replica
+    chosen for the request by ReplicaMiddleware, and everything else
+    (writes, reads in a transaction, other apps) to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None:
+            return None
+        if model._meta.app_label not in REPLICA_APPS and model._meta.label not in REPLICA_MODELS:
+            return None
+        if _wrote.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads after a write must see it, including objects loaded
+            # from the replica before it
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Pick a replica for each safe request, and keep a browser on the primary
+    for DATABASE_REPLICA_PIN_SECONDS after it writes (read-your-writes).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 15)
+
+    def __call__(self, request):
+        available = replicas()
+        replica = None
+        if available and request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES:
+            replica = random.choice(available)
+
+        replica_token = _replica.set(replica)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _replica.reset(replica_token)
+            _wrote.reset(wrote_token)
+
+        if available and wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,126 @@
+# riseapp/signals.py
+
+import hashlib
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from . import versions
+from .images import VARIANT_FIELDS, variants_stale
+from .jobs import enqueue
+from .storage import file_fields
+from .tasks import render_image_variants
+
+
+def update_image_variants(sender, instance, raw=False, **kwargs):
+    """Queue rendering of WebP/JPEG renditions when an image is uploaded or replaced"""
+    if raw or getattr(instance, "media_type", "image") != "image":
+        return
+
+    label = sender._meta.label
+    for field in VARIANT_FIELDS[label]:
+        if not variants_stale(instance, field):
+            continue
+        source = hashlib.sha1(getattr(instance, field).name.encode()).hexdigest()
+        enqueue(
+            render_image_variants,
+            args=(label, instance.pk, field),
+            idempotency_key=f"image-variants:{label}:{instance.pk}:{field}:{source}",
+        )
+
+
+for label in VARIANT_FIELDS:
+    post_save.connect(update_image_variants, sender=label)
+
+
+def _release(fields, names):
+    """Drop the blob references held by names, once the transaction commits"""
+    def release():
+        for field, name in zip(fields, names):
+            if name:
+                field.storage.delete(name)
+
+    transaction.on_commit(release)
+
+
+def remember_blob_names(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note which blobs an existing row refers to before it is overwritten"""
+    fields = file_fields(sender)
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {f.name for f in fields} & set(update_fields):
+        return
+    instance._blob_names = (
+        sender._default_manager.filter(pk=instance.pk)
+        .values_list(*(f.attname for f in fields))
+        .first()
+    )
+    # Files assigned but not yet written: storing each takes a new reference,
+    # even when the content (and so the name) is the one already stored
+    instance._blob_uploads = [not getattr(instance, f.attname)._committed for f in fields]
+
+
+def release_replaced_blobs(sender, instance, **kwargs):
+    """Release the blobs a save replaced"""
+    old_names = instance.__dict__.pop("_blob_names", None)
+    uploads = instance.__dict__.pop("_blob_uploads", None)
+    if not old_names:
+        return
+    fields = file_fields(sender)
+    replaced = [
+        old if uploaded or old != getattr(instance, field.attname).name else None
+        for field, old, uploaded in zip(fields, old_names, uploads)
+    ]
+    _release(fields, replaced)
+
+
+def release_deleted_blobs(sender, instance, **kwargs):
+    """Release the blobs a deleted row referred to"""
+    fields = file_fields(sender)
+    _release(fields, [getattr(instance, field.attname).name for field in fields])
+
+
+for model in apps.get_models():
+    if file_fields(model):
+        pre_save.connect(remember_blob_names, sender=model)
+        post_save.connect(release_replaced_blobs, sender=model)
+        post_delete.connect(release_deleted_blobs, sender=model)
+
+
+def check_tracked_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note whether a save touches the fields pages show (see versions.TRACKED)"""
+    fields = versions.TRACKED[sender._meta.label]
+    if raw or instance._state.adding or instance.pk is None:
+        instance._content_changed = not raw
+        return
+    if update_fields is not None and not set(fields) & set(update_fields):
+        instance._content_changed = False
+        return
+    old = sender._default_manager.filter(pk=instance.pk).values_list(*fields).first()
+    instance._content_changed = old != tuple(
+        sender._meta.get_field(field).value_from_object(instance) for field in fields
+    )
+
+
+def bump_content_version(sender, instance=None, raw=False, **kwargs):
+    """Invalidate pages built from a tracked model when one of its rows changes"""
+    if raw or not instance.__dict__.pop("_content_changed", True):
+        return
+    versions.bump(sender._meta.label)
+
+
+def bump_related_content_version(sender, instance, action, reverse, model, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        versions.bump((model if reverse else type(instance))._meta.label)
+
+
+for label, fields in versions.TRACKED.items():
+    model = apps.get_model(label)
+    if fields is not None:
+        pre_save.connect(check_tracked_fields, sender=model)
+    post_save.connect(bump_content_version, sender=model)
+    post_delete.connect(bump_content_version, sender=model)
+    if fields is None:
+        for field in model._meta.many_to_many:
+            m2m_changed.connect(bump_related_content_version, sender=field.remote_field.through)
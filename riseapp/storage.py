@@ -0,0 +1,114 @@
+# riseapp/storage.py
+
+import hashlib
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+# Blobs live under MEDIA_ROOT/blobs/ab/cd/<sha256><ext>: two levels of 256
+# directories keep each one small however many files are stored
+BLOB_ROOT = "blobs"
+
+# Renditions and other files made from a blob sit in this subdirectory of the
+# blob's own, and go when the blob does
+DERIVED_DIR = "variants"
+
+
+def blob_name(digest, extension):
+    return posixpath.join(BLOB_ROOT, digest[:2], digest[2:4], digest + extension.lower())
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names each upload after the SHA-256 of its content.
+
+    Identical uploads share one file, whatever field or name they came
+    with; Blob rows count the references to each file, and delete() only
+    removes a file once nothing refers to it. Names stored before this
+    storage was used (outside BLOB_ROOT) keep working, and are never
+    deleted, as before.
+
+    Uses MEDIA_ROOT/MEDIA_URL like the default storage, so existing names
+    resolve to the same files.
+    """
+
+    def __init__(self, **kwargs):
+        # Same name means same content, so a racing writer can safely
+        # overwrite
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    @property
+    def derived(self):
+        """Plain storage at the same location for files derived from blobs"""
+        return FileSystemStorage(location=self.location, base_url=self.base_url)
+
+    def _blobs(self):
+        return apps.get_model("riseapp", "Blob").objects
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+
+        name = blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+        with transaction.atomic():
+            blobs = self._blobs()
+            if not blobs.filter(name=name).update(refcount=F("refcount") + 1):
+                try:
+                    with transaction.atomic():
+                        blobs.create(name=name, size=size, refcount=1)
+                except IntegrityError:
+                    blobs.filter(name=name).update(refcount=F("refcount") + 1)
+
+            if not self.exists(name):
+                name = super()._save(name, content)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is only known once the content is hashed, in _save
+        return name
+
+    def delete(self, name):
+        """Drop one reference to a blob, removing its files with the last one"""
+        if not name or not name.startswith(BLOB_ROOT + "/"):
+            return
+
+        blobs = self._blobs()
+        with transaction.atomic():
+            blobs.filter(name=name, refcount__gt=0).update(refcount=F("refcount") - 1)
+            removed, _ = blobs.filter(name=name, refcount=0).delete()
+        if not removed:
+            return
+
+        super().delete(name)
+        folder, filename = posixpath.split(name)
+        stem = posixpath.splitext(filename)[0]
+        derived_dir = posixpath.join(folder, DERIVED_DIR)
+        try:
+            _, files = self.listdir(derived_dir)
+        except FileNotFoundError:
+            return
+        for derived in files:
+            if derived.startswith(stem):
+                super().delete(posixpath.join(derived_dir, derived))
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def file_fields(model):
+    """The model's file fields kept in content-addressed storage"""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(getattr(field, "storage", None), ContentAddressedStorage)
+    ]
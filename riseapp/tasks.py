@@ -0,0 +1,14 @@
+# riseapp/tasks.py
+
+from django.apps import apps
+
+from .images import refresh_variants
+from .jobs import task
+
+
+@task(priority=-1)
+def render_image_variants(label, pk, field):
+    """Render the WebP/JPEG renditions of one image field"""
+    instance = apps.get_model(label).objects.filter(pk=pk).first()
+    if instance is not None:
+        refresh_variants(instance, field)
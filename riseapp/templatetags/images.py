@@ -0,0 +1,34 @@
+# riseapp/templatetags/images.py
+
+from django import template
+from django.utils.html import format_html
+
+from riseapp import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(instance, field, fmt="jpeg"):
+    """`srcset` value listing an image field's renditions in one format"""
+    return images.srcset(instance, field, fmt)
+
+
+@register.simple_tag
+def webp_source(instance, field, sizes):
+    """
+    <source> offering the WebP renditions of an image field, for use inside
+    <picture> ahead of the <img> fallback; empty when there are none.
+    """
+    value = images.srcset(instance, field, "webp")
+    if not value:
+        return ""
+    return format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">', value, sizes
+    )
+
+
+@register.simple_tag
+def variant_url(instance, field, width, fmt="jpeg"):
+    """URL of the smallest rendition at least `width` pixels wide"""
+    return images.variant_url(instance, field, int(width), fmt)
@@ -0,0 +1,52 @@
+# riseapp/versions.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContentVersion
+
+# Models whose changes invalidate rendered pages, and the fields that matter
+# (None: any change). Narrowing a field list keeps frequent saves, such as
+# the profile save on every login, from invalidating every page.
+TRACKED = {
+    "community.Blog": None,
+    "community.Project": None,
+    "community.ProjectImage": None,
+    "community.ProjectCategory": None,
+    "community.Skill": None,
+    "community.Activity": None,
+    "community.ActivityImage": None,
+    "accounts.User": ("username", "first_name", "last_name"),
+    "accounts.Profile": ("profile_pic", "profile_pic_variants"),
+}
+
+
+def bump(label):
+    """Record that rows of a model changed"""
+    now = timezone.now()
+    updated = ContentVersion.objects.filter(label=label).update(
+        version=F("version") + 1, changed_at=now
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ContentVersion.objects.create(label=label, version=1, changed_at=now)
+        except IntegrityError:
+            bump(label)
+
+
+def stamp(*labels):
+    """
+    A token that changes whenever any of the models change, and when the
+    latest of those changes happened (None if never). One indexed query.
+    """
+    found = dict(
+        (label, (version, changed_at))
+        for label, version, changed_at in ContentVersion.objects.filter(
+            label__in=labels
+        ).values_list("label", "version", "changed_at")
+    )
+    token = ".".join(str(found.get(label, (0, None))[0]) for label in labels)
+    changed = [changed_at for _, changed_at in found.values()]
+    return token, max(changed) if changed else None
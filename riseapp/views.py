@@ -2,8 +2,10 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .models import Contact, Newsletter
 from django.db import IntegrityError
+from .conditional import conditional_page
 
 
+@conditional_page(cache_anonymous=True)
 def home(request):
     if request.method == "POST":
         # Handle contact form submission
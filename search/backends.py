@@ -0,0 +1,91 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+# Highlight markers returned inside snippets; search.query turns them into
+# <mark> tags after HTML-escaping the text around them
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+TERM_RE = re.compile(r"\w+")
+
+
+def query_terms(query):
+    """Words of a user query; operators and punctuation are ignored"""
+    return TERM_RE.findall(query.lower())
+
+
+class SQLiteFTSBackend:
+    """FTS5 MATCH over search_index, ranked by BM25"""
+
+    # bm25() is lower-is-better; a title hit weighs ten times a body hit
+    SQL = """
+        SELECT entry.id,
+               bm25(search_index, 10.0, 1.0) AS score,
+               snippet(search_index, 1, %s, %s, '…', 24) AS snippet
+        FROM search_index
+        JOIN search_searchentry AS entry ON entry.id = search_index.rowid
+        WHERE search_index MATCH %s {kinds}
+        ORDER BY score
+        LIMIT %s OFFSET %s
+    """
+
+    def match_expression(self, terms):
+        # Every term must match; the last one is treated as a prefix so
+        # results keep up while the user is still typing
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, terms, kinds, limit, offset):
+        kind_sql = ""
+        if kinds:
+            kind_sql = "AND entry.kind IN (%s)" % ", ".join(["%s"] * len(kinds))
+        params = [MARK_START, MARK_END, self.match_expression(terms), *kinds, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(self.SQL.format(kinds=kind_sql), params)
+            return cursor.fetchall()
+
+
+class PostgresBackend:
+    """tsquery match over the generated search_vector column, ranked by ts_rank_cd"""
+
+    SQL = """
+        SELECT entry.id,
+               ts_rank_cd(entry.search_vector, query) AS score,
+               ts_headline('english', entry.body, query, %s) AS snippet
+        FROM search_searchentry AS entry, to_tsquery('english', %s) AS query
+        WHERE entry.search_vector @@ query {kinds}
+        ORDER BY score DESC
+        LIMIT %s OFFSET %s
+    """
+
+    HEADLINE_OPTIONS = f"StartSel={MARK_START}, StopSel={MARK_END}, MinWords=15, MaxWords=35"
+
+    def match_expression(self, terms):
+        return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+    def search(self, terms, kinds, limit, offset):
+        kind_sql = ""
+        if kinds:
+            kind_sql = "AND entry.kind IN (%s)" % ", ".join(["%s"] * len(kinds))
+        params = [self.HEADLINE_OPTIONS, self.match_expression(terms), *kinds, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(self.SQL.format(kinds=kind_sql), params)
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresBackend,
+}
+
+
+def get_backend():
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Full-text search is not available for the {connection.vendor} backend"
+        )
@@ -0,0 +1,98 @@
+import html
+
+from django.apps import apps
+from django.db import transaction
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from .models import SearchEntry
+
+TITLE_MAX_LENGTH = SearchEntry._meta.get_field("title").max_length
+
+
+def _text(*values):
+    """Plain text of some (possibly HTML) fields, joined by blank lines"""
+    parts = (html.unescape(strip_tags(value)).strip() for value in values if value)
+    return "\n\n".join(part for part in parts if part)
+
+
+def _feed_post_document(post):
+    if not post.is_active:
+        return None
+    # Blog and project bodies are TinyMCE HTML, normal posts are plain text
+    is_html = post.post_type in ("blog", "project")
+    return {
+        "title": post.title or "",
+        "body": _text(post.content) if is_html else (post.content or ""),
+        "url": reverse("feed:post_detail", args=[post.pk]),
+        "created_at": post.created_at,
+    }
+
+
+def _blog_document(blog):
+    if blog.status != "published":
+        return None
+    return {
+        "title": blog.title,
+        "body": _text(blog.excerpt, blog.content),
+        "url": reverse("community:blog_detail", args=[blog.slug]),
+        "created_at": blog.published_at or blog.created_at,
+    }
+
+
+def _project_document(project):
+    return {
+        "title": project.title,
+        "body": _text(project.description, project.details, project.special_highlight),
+        "url": reverse("community:project_detail", args=[project.pk]),
+        "created_at": project.created_at,
+    }
+
+
+# kind -> (model label, document builder); a builder returns None for
+# objects that must not be findable (inactive posts, unpublished blogs)
+SOURCES = {
+    "feed_post": ("feed.FeedPost", _feed_post_document),
+    "blog": ("community.Blog", _blog_document),
+    "project": ("community.Project", _project_document),
+}
+
+KIND_FOR_MODEL = {label: kind for kind, (label, _) in SOURCES.items()}
+
+
+def index_object(kind, obj):
+    """Add, refresh or drop one object's entry"""
+    document = SOURCES[kind][1](obj)
+    if document is None:
+        unindex_object(kind, obj.pk)
+        return
+
+    document["title"] = document["title"][:TITLE_MAX_LENGTH]
+    SearchEntry.objects.update_or_create(
+        kind=kind, object_id=obj.pk, defaults=document
+    )
+
+
+def unindex_object(kind, pk):
+    SearchEntry.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild(kinds=None, batch_size=500):
+    """Re-create the entries of the given kinds (default: all) from scratch"""
+    counts = {}
+    for kind in kinds or SOURCES:
+        label, build = SOURCES[kind]
+        model = apps.get_model(label)
+
+        entries = []
+        for obj in model.objects.order_by("pk").iterator(chunk_size=batch_size):
+            document = build(obj)
+            if document is not None:
+                document["title"] = document["title"][:TITLE_MAX_LENGTH]
+                entries.append(SearchEntry(kind=kind, object_id=obj.pk, **document))
+
+        with transaction.atomic():
+            SearchEntry.objects.filter(kind=kind).delete()
+            SearchEntry.objects.bulk_create(entries, batch_size=batch_size)
+        counts[kind] = len(entries)
+    return counts
@@ -0,0 +1,27 @@
+# search/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from search.indexing import SOURCES, rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from posts, blogs and projects"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=list(SOURCES),
+            action="append",
+            help="Only rebuild entries of this kind (may be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding search index...")
+
+        counts = rebuild(options.get("kind"))
+        for kind, count in counts.items():
+            self.stdout.write(f"  {kind}: {count} entries")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nCompleted! Indexed {sum(counts.values())} objects.")
+        )
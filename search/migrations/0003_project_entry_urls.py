@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.urls import reverse
+
+
+def link_project_entries(apps, schema_editor):
+    # Project hits used to link to the projects list; point each at its page
+    SearchEntry = apps.get_model("search", "SearchEntry")
+    entries = list(SearchEntry.objects.filter(kind="project"))
+    for entry in entries:
+        entry.url = reverse("community:project_detail", args=[entry.object_id])
+    SearchEntry.objects.bulk_update(entries, ["url"], batch_size=500)
+
+
+def link_projects_list(apps, schema_editor):
+    SearchEntry = apps.get_model("search", "SearchEntry")
+    SearchEntry.objects.filter(kind="project").update(url=reverse("community:projects_list"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(link_project_entries, link_projects_list),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """
+    Plain-text copy of one searchable object (see search.indexing).
+
+    The full-text index itself lives outside the ORM: an FTS5 table fed by
+    triggers on SQLite, a generated tsvector column on PostgreSQL (see the
+    search_index migration and search.backends).
+    """
+
+    KIND_CHOICES = (
+        ("feed_post", "Post"),
+        ("blog", "Blog"),
+        ("project", "Project"),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=255)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("kind", "object_id")
+        verbose_name_plural = "Search entries"
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
@@ -0,0 +1,40 @@
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .backends import MARK_END, MARK_START, get_backend, query_terms
+from .models import SearchEntry
+
+PAGE_SIZE = 20
+
+
+def _highlight(snippet):
+    text = escape(snippet or "")
+    return mark_safe(text.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+def search(query, kinds=None, page=1, page_size=PAGE_SIZE):
+    """
+    Ranked full-text search over the SearchEntry index.
+
+    Returns (entries, has_next). Each entry carries `score` and a highlighted
+    `snippet`. One ranked query against the index fetches the page (plus one
+    row to detect a next page) and one IN query loads the entries.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], False
+
+    offset = (max(page, 1) - 1) * page_size
+    rows = get_backend().search(terms, list(kinds or []), page_size + 1, offset)
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    entries = SearchEntry.objects.in_bulk([entry_id for entry_id, _, _ in rows])
+    results = []
+    for entry_id, score, snippet in rows:
+        entry = entries.get(entry_id)
+        if entry is not None:
+            entry.score = score
+            entry.snippet = _highlight(snippet)
+            results.append(entry)
+    return results, has_next
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+
+from .indexing import KIND_FOR_MODEL, index_object, unindex_object
+
+
+def update_search_entry(sender, instance, **kwargs):
+    index_object(KIND_FOR_MODEL[sender._meta.label], instance)
+
+
+def remove_search_entry(sender, instance, **kwargs):
+    unindex_object(KIND_FOR_MODEL[sender._meta.label], instance.pk)
+
+
+for label in KIND_FOR_MODEL:
+    post_save.connect(update_search_entry, sender=label)
+    post_delete.connect(remove_search_entry, sender=label)
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from community.models import Blog, Project
+from feed.models import FeedPost
+
+from .backends import PostgresBackend, SQLiteFTSBackend, query_terms
+from .indexing import rebuild
+from .models import SearchEntry
+from .query import search
+
+User = get_user_model()
+
+
+class QueryTermsTests(SimpleTestCase):
+    def test_operators_and_punctuation_are_dropped(self):
+        self.assertEqual(query_terms('Django "ORM" -tips OR (fts5)*'), ["django", "orm", "tips", "or", "fts5"])
+
+    def test_last_term_matches_as_a_prefix(self):
+        self.assertEqual(SQLiteFTSBackend().match_expression(["async", "jav"]), '"async" "jav"*')
+        self.assertEqual(PostgresBackend().match_expression(["async", "jav"]), "async & jav:*")
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", email="author@example.com", password="pass")
+
+    def titles(self, query, **kwargs):
+        return [entry.title for entry in search(query, **kwargs)[0]]
+
+    def post(self, **fields):
+        fields.setdefault("post_type", "normal")
+        return FeedPost.objects.create(author=self.author, **fields)
+
+    def project(self, title, description="A project"):
+        return Project.objects.create(
+            title=title, description=description, details="<p>Details</p>",
+            thumbnail="project_thumbnails/cover.png", leader=self.author,
+        )
+
+    def test_saving_and_deleting_keep_the_index_current(self):
+        post = self.post(normal_content="Learning kubernetes today")
+        self.assertEqual(len(search("kubernetes")[0]), 1)
+
+        post.normal_content = "Learning terraform today"
+        post.save()
+        self.assertEqual(search("kubernetes")[0], [])
+        self.assertEqual(search("terraform")[0][0].object_id, post.pk)
+
+        post.delete()
+        self.assertEqual(search("terraform")[0], [])
+        self.assertFalse(SearchEntry.objects.exists())
+
+    def test_hidden_content_is_not_indexed(self):
+        post = self.post(normal_content="Secret roadmap")
+        post.is_active = False
+        post.save()
+        blog = Blog.objects.create(author=self.author, title="Roadmap draft", slug="roadmap", content="<p>Soon</p>")
+        self.assertEqual(search("roadmap")[0], [])
+
+        blog.status = "published"
+        blog.save()
+        self.assertEqual(self.titles("roadmap"), ["Roadmap draft"])
+
+    def test_title_hits_rank_above_body_hits(self):
+        self.project("Compiler notes", description="Parsing tricks")
+        self.project("Parser combinators", description="Small building blocks")
+        self.project("Weekend hacks", description="A tiny parser for config files")
+
+        self.assertEqual(self.titles("parser"), ["Parser combinators", "Weekend hacks"])
+        # The last term is a prefix, which also reaches "parsing"
+        titles = self.titles("pars")
+        self.assertEqual(titles[0], "Parser combinators")
+        self.assertEqual(sorted(titles[1:]), ["Compiler notes", "Weekend hacks"])
+
+    def test_snippets_escape_html_around_the_highlight(self):
+        self.post(normal_content='Try <script>alert("x")</script> before the keyword websockets')
+        snippet = search("websockets")[0][0].snippet
+
+        self.assertIn("<mark>websockets</mark>", snippet)
+        self.assertIn("&lt;script&gt;", snippet)
+        self.assertNotIn("<script>", snippet)
+
+    def test_html_bodies_are_indexed_as_text(self):
+        Blog.objects.create(
+            author=self.author, title="Styling", slug="styling", status="published",
+            content='<p class="lead">Use <strong>flexbox</strong> &amp; grid</p>',
+        )
+        entry = SearchEntry.objects.get(kind="blog")
+        self.assertEqual(entry.body, "Use flexbox & grid")
+        self.assertEqual(self.titles("lead"), [])
+
+    def test_project_hits_link_to_the_project(self):
+        project = self.project("Rise platform")
+        entry = search("rise")[0][0]
+        self.assertEqual(entry.url, reverse("community:project_detail", args=[project.pk]))
+        self.assertContains(self.client.get(entry.url), "Rise platform")
+
+    def test_rebuild_recreates_entries(self):
+        self.post(normal_content="Rebuilt entry")
+        SearchEntry.objects.all().delete()
+
+        self.assertEqual(rebuild(), {"feed_post": 1, "blog": 0, "project": 0})
+        self.assertEqual(len(search("rebuilt")[0]), 1)
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(username="member", email="member@example.com", password="pass")
+        FeedPost.objects.create(author=self.member, post_type="normal", normal_content="Members talk about graphql")
+        Blog.objects.create(
+            author=self.member, title="Public graphql guide", slug="graphql", status="published", content="<p>Hi</p>"
+        )
+        self.url = reverse("search:search")
+
+    def results(self, **params):
+        return [entry.kind for entry in self.client.get(self.url, params).context["results"]]
+
+    def test_anonymous_visitors_only_find_public_content(self):
+        self.assertEqual(self.results(q="graphql"), ["blog"])
+        self.assertEqual(self.results(q="graphql", type="feed_post"), ["blog"])
+
+    def test_members_also_find_feed_posts(self):
+        self.client.force_login(self.member)
+        self.assertEqual(sorted(self.results(q="graphql")), ["blog", "feed_post"])
+        self.assertEqual(self.results(q="graphql", type="feed_post"), ["feed_post"])
+
+    def test_empty_query_runs_no_search(self):
+        response = self.client.get(self.url, {"q": "  "})
+        self.assertEqual(list(response.context["results"]), [])
@@ -0,0 +1,39 @@
+from django.shortcuts import render
+
+from .models import SearchEntry
+from .query import search as run_search
+
+
+def search(request):
+    """Full-text search across posts, blogs and projects"""
+    query = request.GET.get("q", "").strip()
+    kind = request.GET.get("type", "")
+
+    kinds = [value for value, _ in SearchEntry.KIND_CHOICES]
+    if not request.user.is_authenticated:
+        # The feed is only visible to members
+        kinds.remove("feed_post")
+    if kind in kinds:
+        kinds = [kind]
+
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    results, has_next = run_search(query, kinds=kinds, page=page) if query else ([], False)
+
+    context = {
+        "query": query,
+        "kind": kind,
+        "kind_choices": [
+            (value, label)
+            for value, label in SearchEntry.KIND_CHOICES
+            if request.user.is_authenticated or value != "feed_post"
+        ],
+        "results": results,
+        "page": page,
+        "has_next": has_next,
+        "TITLE": "Search",
+    }
+    return render(request, "search/results.html", context)